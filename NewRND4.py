@@ -3,7 +3,14 @@ import sys
 import os
 import datetime
 import re
-from PIL import Image
+import io
+import json
+import time
+import threading
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from PIL import Image, ImageChops
 from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -13,10 +20,12 @@ from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QFileDialog, QCheckBox, QSpinBox, QGroupBox,
     QMessageBox, QComboBox, QListWidget, QListWidgetItem, QScrollArea
 )
-from PyQt5.QtGui import QPixmap, QScreen, QGuiApplication
-from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QPixmap, QImage, QImageWriter, QScreen, QGuiApplication, QPainter, QColor, QPen
+from PyQt5.QtCore import Qt, QRect, QBuffer, QIODevice, QTimer, pyqtSignal
+from PyQt5 import sip
 import logging
 import ctypes # For admin check on Windows and Taskbar control
+from ctypes import wintypes
 
 # --- Attempt to import keyboard and handle potential ImportError ---
 try:
@@ -40,6 +49,7 @@ except ImportError:
 try:
     import openpyxl
     from openpyxl.drawing.image import Image as ExcelImage
+    from openpyxl.cell import WriteOnlyCell
     OPENPYXL_AVAILABLE = True
 except ImportError:
     OPENPYXL_AVAILABLE = False
@@ -52,6 +62,74 @@ FindWindow = ctypes.windll.user32.FindWindowW
 ShowWindow = ctypes.windll.user32.ShowWindow
 SW_HIDE = 0
 SW_SHOW = 5
+DWMWA_EXTENDED_FRAME_BOUNDS = 9 # Window rect without the invisible resize border / shadow
+
+# --- Capture pipeline: grabs happen on the GUI thread, PNG encoding on this many worker threads ---
+CAPTURE_ENCODE_WORKERS = 2
+# Frames allowed to wait for the encoder/writer; burst and interval ticks are deferred while it is full
+CAPTURE_RING_FRAMES = 16
+# ...or while the raw grabs still held for them add up to this much (a virtual-desktop RGB32 grab on several 4K screens is ~100 MB)
+CAPTURE_RING_BYTES = 512 * 1024 * 1024
+
+# --- Image codecs offered for captures: combo label -> (Qt format, file extension) ---
+# PNG takes a compression level (0-9), JPEG a quality (1-100); WebP is always written lossless.
+CAPTURE_CODECS = {
+    "PNG": ("PNG", ".png"),
+    "WebP (lossless)": ("WEBP", ".webp"),
+    "JPEG": ("JPG", ".jpg"),
+}
+DEFAULT_PNG_LEVEL = 6
+DEFAULT_JPEG_QUALITY = 90
+# Documents embed a copy resampled to display size at this DPI; originals stay on disk at full resolution
+DEFAULT_EMBED_DPI = 150
+# Excel index rows show a thumbnail this many pixels high (at 96 DPI), made by the encode worker at capture time
+EXCEL_THUMB_HEIGHT = 200
+
+# --- Near-duplicate detection: captures whose 64-bit dHash is within this many bits of one of the
+# last DEDUP_WINDOW captures of the same screen/area are candidates. A candidate only counts as a duplicate if no
+# pixel of a DEDUP_CHECK_SIZE grayscale copy differs by more than DEDUP_PIXEL_TOLERANCE grey levels, so a changed
+# status line, clock or caret is not mistaken for a repeat ---
+DEDUP_WINDOW = 10
+DEDUP_MAX_DISTANCE = 5
+DEDUP_CHECK_SIZE = (480, 270)
+DEDUP_PIXEL_TOLERANCE = 8
+
+# --- Session journals: one JSON line per capture, fsynced, so a crash mid-session can be recovered ---
+SESSION_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".screenshot_tool_sessions")
+
+# --- Helper to crop a grabbed QImage without copying pixels ---
+def crop_view(image, rect):
+    # Returns a QImage over the same pixel buffer as `image` (same stride, offset start pointer).
+    # The caller must keep `image` alive for as long as the view is in use.
+    rect = rect.intersected(image.rect())
+    if rect == image.rect():
+        return image
+    address = int(image.constBits()) + rect.y() * image.bytesPerLine() + rect.x() * (image.depth() // 8)
+    return QImage(sip.voidptr(address), rect.width(), rect.height(), image.bytesPerLine(), image.format())
+
+# --- Helper to fingerprint a capture for near-duplicate detection ---
+def perceptual_hash(image):
+    # Difference hash: 9x8 grayscale thumbnail, one bit per left/right neighbour comparison.
+    # The fast pre-shrink keeps the smooth scale cheap on multi-megapixel grabs.
+    small = image.scaled(288, 256, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+    small = small.scaled(9, 8, Qt.IgnoreAspectRatio, Qt.SmoothTransformation).convertToFormat(QImage.Format_Grayscale8)
+    value = 0
+    for y in range(8):
+        for x in range(8):
+            value = (value << 1) | int((small.pixel(x, y) & 0xFF) > (small.pixel(x + 1, y) & 0xFF))
+    return value
+
+def duplicate_check_image(image, source_image=None):
+    # Grayscale copy kept for the pixel comparison in images_match. As in perceptual_hash, a fast pre-shrink to twice
+    # the check size keeps the smooth scale cheap. source_image is the grab a cropped view points into, held until done.
+    small = image.scaled(DEDUP_CHECK_SIZE[0] * 2, DEDUP_CHECK_SIZE[1] * 2, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+    small = small.scaled(DEDUP_CHECK_SIZE[0], DEDUP_CHECK_SIZE[1], Qt.IgnoreAspectRatio, Qt.SmoothTransformation).convertToFormat(QImage.Format_Grayscale8)
+    bits = small.constBits(); bits.setsize(small.sizeInBytes())
+    return Image.frombuffer("L", DEDUP_CHECK_SIZE, bytes(bits), "raw", "L", small.bytesPerLine(), 1)
+
+def images_match(a, b):
+    # A single changed region anywhere (even one digit of a status line survives the downscale) keeps captures distinct
+    return ImageChops.difference(a, b).getextrema()[1] <= DEDUP_PIXEL_TOLERANCE
 
 # --- Helper function to check for Admin privileges on Windows ---
 def is_admin():
@@ -86,7 +164,52 @@ def set_taskbar_visibility(visible):
         return False
 
 
+class RegionSelector(QWidget):
+    # Dimmed, frameless overlay across the whole virtual desktop; drag out a rectangle to capture.
+    # Emits the rectangle in virtual desktop coordinates. Esc cancels.
+    region_selected = pyqtSignal(QRect)
+
+    def __init__(self, bounds):
+        super().__init__(None, Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground); self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setGeometry(bounds); self.setCursor(Qt.CrossCursor)
+        self.origin = None; self.selection = QRect()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 90))
+        if not self.selection.isNull():
+            painter.setCompositionMode(QPainter.CompositionMode_Clear)
+            painter.fillRect(self.selection, Qt.transparent)
+            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+            painter.setPen(QPen(QColor(255, 0, 0), 2)); painter.drawRect(self.selection)
+
+    def mousePressEvent(self, event):
+        self.origin = event.pos(); self.selection = QRect(self.origin, self.origin); self.update()
+
+    def mouseMoveEvent(self, event):
+        if self.origin is not None:
+            self.selection = QRect(self.origin, event.pos()).normalized(); self.update()
+
+    def mouseReleaseEvent(self, event):
+        if self.origin is None: return
+        selection = QRect(self.origin, event.pos()).normalized()
+        if selection.width() > 4 and selection.height() > 4: # Ignore stray clicks
+            self.region_selected.emit(selection.translated(self.geometry().topLeft()))
+        self.close()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.close()
+
+
 class ScreenshotApp(QWidget):
+    # Cross-thread notifications; Qt queues these onto the GUI thread
+    hotkey_pressed = pyqtSignal()
+    capture_processed = pyqtSignal(str, object, str)
+    capture_failed = pyqtSignal(bool, str, str)
+    excel_finished = pyqtSignal(str, str) # Excel path, error message ("" on success)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Screenshot Tool")
@@ -104,6 +227,41 @@ class ScreenshotApp(QWidget):
         self.capture_mode = "single"
         self.excel_path = None
         self.taskbar_hidden = False # Track taskbar state
+        self.capture_codec = None # Codec settings snapshot for the running session
+        self.embed_dpi = DEFAULT_EMBED_DPI
+        self.embed_width_px = 0 # Width Word copies are resampled to (0 = embed originals)
+        self.dedup_mode = "off" # off / skip / flag, taken per session
+        self.excel_thumbnails = False # Whether captures make Excel thumbnails, taken per session from the Excel checkbox
+        self.recent_hashes = {} # screen/area key -> deque of (hash, screenshot label, check image or its Future, or None)
+
+        # --- Burst / interval capture timers (GUI thread) ---
+        self.burst_timer = QTimer(self); self.burst_timer.timeout.connect(self.burst_tick)
+        self.interval_timer = QTimer(self); self.interval_timer.timeout.connect(self.interval_tick)
+        self.burst_frame = 0; self.burst_frames_total = 0; self.burst_queued = 0
+        self.interval_frame = 0; self.interval_queued = 0
+        self.backpressure_logged = False
+        self.pending_grabs = {} # id(grab) -> [bytes, encodes still using it]; a grab shared by several crops counts once
+        self.pending_grabs_lock = threading.Lock()
+        self.capture_region = None # Last drag-selected region (virtual desktop coords), reused until changed
+        self.region_selector = None
+        self.session_journal = None # Open journal file handle while capturing
+        self.session_journal_path = None
+        self.doc_future = None # Pending background load of an appended document
+        self.doc_load_lock = threading.Lock()
+        self.previous_session_images = [] # Images recorded in an appended document's metadata
+
+        # --- Asynchronous capture pipeline ---
+        # The hotkey only grabs pixels; encoding runs on a pool and a single writer thread
+        # applies finished captures to the Word document in the order they were taken.
+        self.encode_pool = ThreadPoolExecutor(max_workers=CAPTURE_ENCODE_WORKERS, thread_name_prefix="capture-encode")
+        self.capture_queue = queue.Queue()
+        self.capture_writer = threading.Thread(target=self.run_capture_writer, name="capture-writer", daemon=True)
+        self.capture_writer.start()
+        self.hotkey_pressed.connect(self.on_capture_trigger)
+        self.capture_processed.connect(self.on_capture_processed)
+        self.capture_failed.connect(self.show_capture_error)
+        self.excel_finished.connect(self.on_excel_finished)
+        self.excel_status_base = ""
 
         # --- Check for Admin privileges early ---
         if not is_admin() and os.name == 'nt':
@@ -133,6 +291,15 @@ class ScreenshotApp(QWidget):
         except Exception as e:
             print(f"CRITICAL: Error setting up logging: {e}")
 
+        # --- Screen topology cache (bounds are not recomputed per hotkey) ---
+        self.screen_topology = None
+        self.refresh_screen_topology()
+        app = QGuiApplication.instance()
+        app.screenAdded.connect(self.on_screens_changed)
+        app.screenRemoved.connect(self.on_screens_changed)
+        for screen in self.screen_topology["screens"]:
+            screen.geometryChanged.connect(self.refresh_screen_topology)
+
         self.init_ui()
 
         # --- Show Admin Warning Dialog AFTER UI is initialized ---
@@ -142,6 +309,9 @@ class ScreenshotApp(QWidget):
                                   "Registering global hotkeys might fail.\n"
                                   "Please restart with 'Run as administrator'.")
 
+        # --- Offer to rebuild documents from sessions that never reached stop_capture ---
+        self.recover_interrupted_sessions()
+
     def init_ui(self):
         # --- UI Setup Code ---
         main_layout = QVBoxLayout()
@@ -178,6 +348,9 @@ class ScreenshotApp(QWidget):
         self.monitor_mode_combo.addItem("Single Monitor")
         self.monitor_mode_combo.addItem("Capture All Monitors (Stitched)")
         self.monitor_mode_combo.addItem("Select Multiple Monitors")
+        self.monitor_mode_combo.addItem("Drag-Selected Region")
+        if os.name == 'nt': # Foreground window lookup uses the Win32 API
+            self.monitor_mode_combo.addItem("Active Window")
         self.monitor_mode_combo.currentIndexChanged.connect(self.monitor_mode_changed)
         monitor_layout.addWidget(self.monitor_mode_combo)
         self.single_monitor_combo = QComboBox()
@@ -186,10 +359,33 @@ class ScreenshotApp(QWidget):
         self.multiple_monitor_list = QListWidget()
         self.populate_multiple_monitor_list()
         monitor_layout.addWidget(self.multiple_monitor_list)
+        region_layout = QHBoxLayout()
+        self.region_button = QPushButton("Select Region...")
+        self.region_button.clicked.connect(self.select_capture_region)
+        self.region_label = QLabel("No region selected")
+        region_layout.addWidget(self.region_button); region_layout.addWidget(self.region_label)
+        monitor_layout.addLayout(region_layout)
         self.update_monitor_visibility()
         monitor_group.setLayout(monitor_layout)
         layout.addWidget(monitor_group)
 
+        # Capture Trigger Group (what one hotkey press does)
+        trigger_group = QGroupBox("Capture Trigger")
+        trigger_group.setStyleSheet("color: black;font-weight: bold;")
+        trigger_layout = QHBoxLayout()
+        self.trigger_mode_combo = QComboBox()
+        self.trigger_mode_combo.addItem("Single Shot")
+        self.trigger_mode_combo.addItem("Burst (N frames)")
+        self.trigger_mode_combo.addItem("Interval (start/stop)")
+        self.burst_frames_spin = QSpinBox(); self.burst_frames_spin.setRange(2, 500); self.burst_frames_spin.setValue(10)
+        self.burst_interval_spin = QSpinBox(); self.burst_interval_spin.setRange(20, 600000); self.burst_interval_spin.setSingleStep(50)
+        self.burst_interval_spin.setValue(200); self.burst_interval_spin.setSuffix(" ms")
+        trigger_layout.addWidget(self.trigger_mode_combo)
+        trigger_layout.addWidget(QLabel("Frames:")); trigger_layout.addWidget(self.burst_frames_spin)
+        trigger_layout.addWidget(QLabel("Every:")); trigger_layout.addWidget(self.burst_interval_spin)
+        trigger_group.setLayout(trigger_layout)
+        layout.addWidget(trigger_group)
+
         # Output Group
         output_group = QGroupBox("Output Settings")
         output_group.setStyleSheet("color: black;font-weight: bold;")
@@ -208,6 +404,32 @@ class ScreenshotApp(QWidget):
         self.increment_spin = QSpinBox()
         self.increment_spin.setValue(1); self.increment_spin.setMinimum(1)
         self.delete_checkbox = QCheckBox("Delete Images After Save")
+        # --- Image format / compression for saved captures ---
+        codec_layout = QHBoxLayout()
+        self.codec_combo = QComboBox()
+        supported_formats = [bytes(fmt).decode().upper() for fmt in QImageWriter.supportedImageFormats()]
+        for codec_name, (qt_format, _) in CAPTURE_CODECS.items():
+            if qt_format in supported_formats or (qt_format == "JPG" and "JPEG" in supported_formats):
+                self.codec_combo.addItem(codec_name)
+            else:
+                logging.warning(f"Image format '{codec_name}' not supported by this Qt build; option hidden.")
+        self.codec_level_label = QLabel("Compression (0-9):")
+        self.codec_level_spin = QSpinBox()
+        self.codec_combo.currentIndexChanged.connect(self.codec_changed)
+        codec_layout.addWidget(QLabel("Image Format:")); codec_layout.addWidget(self.codec_combo)
+        codec_layout.addWidget(self.codec_level_label); codec_layout.addWidget(self.codec_level_spin)
+        self.codec_changed()
+        embed_layout = QHBoxLayout()
+        self.embed_dpi_spin = QSpinBox()
+        self.embed_dpi_spin.setRange(0, 600); self.embed_dpi_spin.setSingleStep(25); self.embed_dpi_spin.setValue(DEFAULT_EMBED_DPI)
+        self.embed_dpi_spin.setSpecialValueText("Full size")
+        self.embed_dpi_spin.setToolTip("Resolution of the copies embedded in Word/Excel. Saved image files are always full size.")
+        embed_layout.addWidget(QLabel("Embedded Image DPI:")); embed_layout.addWidget(self.embed_dpi_spin)
+        dedup_layout = QHBoxLayout()
+        self.dedup_combo = QComboBox()
+        self.dedup_combo.addItems(["Off", "Skip", "Flag"])
+        self.dedup_combo.setToolTip("Near-identical captures (e.g. hotkey pressed twice on an unchanged screen): skip them, or keep and mark them.")
+        dedup_layout.addWidget(QLabel("Duplicate Handling:")); dedup_layout.addWidget(self.dedup_combo)
         self.generate_excel_checkbox = QCheckBox("Generate Excel Document with Images")
         if not OPENPYXL_AVAILABLE:
              self.generate_excel_checkbox.setEnabled(False)
@@ -226,6 +448,9 @@ class ScreenshotApp(QWidget):
         inc_layout = QHBoxLayout()
         inc_layout.addWidget(QLabel("Increment By:")); inc_layout.addWidget(self.increment_spin)
         output_layout.addLayout(inc_layout)
+        output_layout.addLayout(codec_layout)
+        output_layout.addLayout(embed_layout)
+        output_layout.addLayout(dedup_layout)
         output_layout.addWidget(self.delete_checkbox);
         output_layout.addWidget(self.generate_excel_checkbox)
         output_layout.addWidget(self.taskbar_checkbox) # Add the new checkbox here
@@ -280,9 +505,66 @@ class ScreenshotApp(QWidget):
         self.resize(650, 750) # Increased height slightly for new checkbox
         # --- End UI Setup Code ---
 
+    def refresh_screen_topology(self, *args):
+        screens = QGuiApplication.screens()
+        geometries = [screen.geometry() for screen in screens]
+        bounds = QRect()
+        for geometry in geometries:
+            bounds = bounds.united(geometry)
+        # One combined grab is only safe when every screen has the same scale factor
+        uniform_dpr = len({screen.devicePixelRatio() for screen in screens}) <= 1
+        self.screen_topology = {"screens": screens, "geometries": geometries, "bounds": bounds, "uniform_dpr": uniform_dpr}
+        logging.info(f"Screen topology refreshed: {len(screens)} screen(s), Virtual Desktop Bounds={bounds}, Uniform DPR: {uniform_dpr}")
+
+    def on_screens_changed(self, screen):
+        if screen in QGuiApplication.screens():
+            screen.geometryChanged.connect(self.refresh_screen_topology)
+        self.refresh_screen_topology()
+        # Monitor indices shift when screens come and go, so the pickers are rebuilt too
+        self.populate_single_monitor_combo()
+        self.populate_multiple_monitor_list()
+
+    def screen_for_rect(self, rect):
+        # Screen whose geometry holds the whole rect; rects spanning screens fall back to the primary screen
+        for screen, geometry in zip(self.screen_topology["screens"], self.screen_topology["geometries"]):
+            if geometry.contains(rect):
+                return screen
+        return QGuiApplication.primaryScreen()
+
+    def grab_screen_rects(self, rects):
+        # One grab of the rects' bounding box (virtual desktop coordinates); each rect comes back as a
+        # zero-copy view into it. Returns (source image, [views]); the views borrow the source's pixels.
+        if not self.screen_topology["uniform_dpr"]:
+            # Mixed scale factors (e.g. 150% laptop + 100% monitor): crops scaled by one screen's ratio would be
+            # offset or mis-sized on the others, so each rect is grabbed through its own screen. Returns (None, [images]).
+            images = []
+            for rect in rects:
+                pixmap = self.screen_for_rect(rect).grabWindow(0, rect.x(), rect.y(), rect.width(), rect.height())
+                if pixmap.isNull():
+                    raise ValueError(f"grabWindow returned a null pixmap for area {rect}.")
+                images.append(pixmap.toImage())
+            logging.info(f"Grabbed {len(rects)} area(s) separately (mixed display scaling)")
+            return None, images
+        bounds = QRect()
+        for rect in rects:
+            bounds = bounds.united(rect)
+        pixmap = self.screen_for_rect(bounds).grabWindow(0, bounds.x(), bounds.y(), bounds.width(), bounds.height())
+        if pixmap.isNull():
+            raise ValueError(f"grabWindow returned a null pixmap for area {bounds}.")
+        source_image = pixmap.toImage()
+        logging.info(f"Grabbed {source_image.width()}x{source_image.height()} for {len(rects)} area(s) at ({bounds.x()},{bounds.y()})")
+        # On scaled displays the grab is in device pixels while screen geometry is in logical pixels
+        ratio = pixmap.devicePixelRatio()
+        views = []
+        for rect in rects:
+            rect = rect.translated(-bounds.x(), -bounds.y())
+            views.append(crop_view(source_image, QRect(round(rect.x() * ratio), round(rect.y() * ratio),
+                                                       round(rect.width() * ratio), round(rect.height() * ratio))))
+        return source_image, views
+
     def populate_single_monitor_combo(self):
         self.single_monitor_combo.clear()
-        screens = QGuiApplication.screens()
+        screens = self.screen_topology["screens"]
         if not screens:
              logging.warning("No screens detected.")
              self.single_monitor_combo.addItem("No Monitors Found")
@@ -296,7 +578,7 @@ class ScreenshotApp(QWidget):
 
     def populate_multiple_monitor_list(self):
         self.multiple_monitor_list.clear()
-        screens = QGuiApplication.screens()
+        screens = self.screen_topology["screens"]
         if not screens:
              logging.warning("No screens detected.")
              item = QListWidgetItem("No Monitors Found")
@@ -318,18 +600,89 @@ class ScreenshotApp(QWidget):
         is_single = "Single Monitor" in mode
         is_multiple = "Select Multiple" in mode
         is_all = "Capture All" in mode
+        is_region = "Region" in mode
+        is_window = "Active Window" in mode
 
         self.single_monitor_combo.setVisible(is_single)
         self.multiple_monitor_list.setVisible(is_multiple)
+        self.region_button.setVisible(is_region)
+        self.region_label.setVisible(is_region)
 
         if is_single: self.capture_mode = "single"
         elif is_multiple: self.capture_mode = "multiple"
         elif is_all: self.capture_mode = "all"
+        elif is_region: self.capture_mode = "region"
+        elif is_window: self.capture_mode = "window"
         logging.info(f"Monitor visibility updated. Mode: {self.capture_mode}")
 
     def monitor_mode_changed(self, index):
         self.update_monitor_visibility()
 
+    def codec_changed(self, index=None):
+        codec_name = self.codec_combo.currentText()
+        if codec_name == "JPEG":
+            self.codec_level_label.setText("Quality (1-100):")
+            self.codec_level_spin.setRange(1, 100); self.codec_level_spin.setValue(DEFAULT_JPEG_QUALITY)
+            self.codec_level_spin.setEnabled(True)
+        elif codec_name == "PNG":
+            self.codec_level_label.setText("Compression (0-9):")
+            self.codec_level_spin.setRange(0, 9); self.codec_level_spin.setValue(DEFAULT_PNG_LEVEL)
+            self.codec_level_spin.setEnabled(True)
+        else:
+            self.codec_level_label.setText("Lossless")
+            self.codec_level_spin.setEnabled(False)
+
+    def current_codec_settings(self):
+        codec_name = self.codec_combo.currentText() or "PNG"
+        qt_format, extension = CAPTURE_CODECS[codec_name]
+        level = self.codec_level_spin.value()
+        if qt_format == "PNG":
+            # Qt maps quality 0..100 onto zlib levels 9..0
+            quality = round((9 - level) * 100 / 9); label = f"PNG L{level}"
+        elif qt_format == "JPG":
+            quality = level; label = f"JPEG Q{level}"
+        else:
+            # Qt's WebP writer switches to lossless at quality 100
+            quality = 100; label = "WebP lossless"
+        return {"format": qt_format, "extension": extension, "quality": quality, "label": label}
+
+    def select_capture_region(self):
+        self.region_selector = RegionSelector(self.screen_topology["bounds"])
+        self.region_selector.region_selected.connect(self.set_capture_region)
+        self.region_selector.show(); self.region_selector.activateWindow()
+
+    def set_capture_region(self, rect):
+        self.capture_region = rect
+        self.region_label.setText(f"{rect.width()}x{rect.height()} at ({rect.x()},{rect.y()})")
+        logging.info(f"Capture region set: {rect}")
+
+    def active_window_rect(self):
+        # Foreground window bounds in Qt (logical) coordinates, or None
+        if os.name != 'nt': return None
+        hwnd = ctypes.windll.user32.GetForegroundWindow()
+        if not hwnd: return None
+        if hwnd == int(self.winId()):
+            logging.warning("Active window capture: the Screenshot Tool itself is in the foreground.")
+            return None
+        rect = wintypes.RECT()
+        # DWM bounds match what is visible; GetWindowRect includes the invisible resize border on Windows 10+
+        if ctypes.windll.dwmapi.DwmGetWindowAttribute(wintypes.HWND(hwnd), DWMWA_EXTENDED_FRAME_BOUNDS,
+                                                      ctypes.byref(rect), ctypes.sizeof(rect)) != 0:
+            ctypes.windll.user32.GetWindowRect(wintypes.HWND(hwnd), ctypes.byref(rect))
+        # Win32 reports device pixels; Qt geometry is in logical pixels on scaled displays. Qt 5 keeps each screen's
+        # top-left at its native position and scales from there, so the window is mapped with the DPR of the screen
+        # its centre is on (screens found by their native extent), not the primary screen's
+        center_x = (rect.left + rect.right) // 2; center_y = (rect.top + rect.bottom) // 2
+        screen = QGuiApplication.primaryScreen()
+        for candidate in self.screen_topology["screens"]:
+            geometry = candidate.geometry(); ratio = candidate.devicePixelRatio()
+            if (geometry.x() <= center_x < geometry.x() + geometry.width() * ratio and
+                    geometry.y() <= center_y < geometry.y() + geometry.height() * ratio):
+                screen = candidate; break
+        origin = screen.geometry().topLeft(); ratio = screen.devicePixelRatio()
+        return QRect(origin.x() + round((rect.left - origin.x()) / ratio), origin.y() + round((rect.top - origin.y()) / ratio),
+                     round((rect.right - rect.left) / ratio), round((rect.bottom - rect.top) / ratio))
+
     def browse_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Output Folder")
         if folder:
@@ -395,8 +748,8 @@ class ScreenshotApp(QWidget):
                 QMessageBox.critical(self, "Error", "Hotkey cannot be empty.")
                 return False
 
-            # Register the new hotkey
-            keyboard.add_hotkey(self.hotkey, self.capture_screenshot)
+            # Register the new hotkey (the keyboard hook thread only emits; the grab runs on the GUI thread)
+            keyboard.add_hotkey(self.hotkey, self.hotkey_pressed.emit)
             self.registered_hotkey = self.hotkey # Store the successfully registered key
             logging.info(f"Registered new hotkey: {self.registered_hotkey}")
             self.status_label.setText(f"Status: Ready (Hotkey: {self.registered_hotkey})")
@@ -448,21 +801,16 @@ class ScreenshotApp(QWidget):
             self.capture_enabled = True; self.screenshot_count = 1
             folder = self.folder_input.text().strip(); case_name = self.test_case_input.text().strip() or "Evidence"; version = self.version_input.text().strip() or "v1"
             base_filename = f"{case_name}_{version}"; self.doc_path = os.path.join(folder, f"{base_filename}.docx"); self.excel_path = os.path.join(folder, f"{base_filename}.xlsx")
-            self.doc = Document() # Create new document object
-
-            # Add Header
-            if len(self.doc.sections) > 0:
-                 header = self.doc.sections[0].header;
-                 # Clear any existing content in the header
-                 for para in header.paragraphs:
-                     para._p.getparent().remove(para._p)
-                 hp = header.add_paragraph();
-                 hr = hp.add_run(f"Test Case: {case_name}"); hr.font.name = 'Arial'; hr.font.size = Pt(12); hr.bold = True;
-                 hp.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            else:
-                logging.warning("Cannot add header: Document has no sections.")
+            self.doc = self.create_document(case_name) # Create new document object with header
+            self.doc_future = None; self.previous_session_images = []
 
             self.captured_data = []; self.captured_images = []; self.delete_images_after_save = self.delete_checkbox.isChecked()
+            self.capture_codec = self.current_codec_settings()
+            self.embed_dpi = self.embed_dpi_spin.value()
+            self.embed_width_px = round(self.picture_width_inches(self.doc) * self.embed_dpi) if self.embed_dpi else 0
+            self.dedup_mode = self.dedup_combo.currentText().lower(); self.recent_hashes.clear()
+            self.excel_thumbnails = OPENPYXL_AVAILABLE and self.generate_excel_checkbox.isChecked()
+            self.open_session_journal("new", case_name)
 
             current_hotkey = getattr(self, 'registered_hotkey', None);
             status_suffix = f"(Hotkey: {current_hotkey})" if current_hotkey else "(Hotkey Disabled)"
@@ -483,12 +831,13 @@ class ScreenshotApp(QWidget):
                     # Optionally notify user? For now, just log it.
 
 
-            logging.info(f"Started new capture. Doc: {self.doc_path}, Excel: {self.excel_path}, Del Img: {self.delete_images_after_save}, Taskbar Hidden: {self.taskbar_hidden}, Hotkey: {current_hotkey if current_hotkey else 'N/A'}")
+            logging.info(f"Started new capture. Doc: {self.doc_path}, Excel: {self.excel_path}, Codec: {self.capture_codec['label']}, Embed: {self.embed_width_px or 'full'} px, Dedup: {self.dedup_mode}, Del Img: {self.delete_images_after_save}, Taskbar Hidden: {self.taskbar_hidden}, Hotkey: {current_hotkey if current_hotkey else 'N/A'}")
 
         except Exception as e:
             logging.error(f"Error during start_new_capture: {e}", exc_info=True)
             QMessageBox.critical(self, "Error", f"An unexpected error occurred starting the new capture:\n{e}")
             self.capture_enabled = False
+            self.close_session_journal(keep=False)
             # Reset UI elements potentially affected
             self.stop_button.setEnabled(False)
             self.start_button.setEnabled(True)
@@ -497,6 +846,23 @@ class ScreenshotApp(QWidget):
             self.unregister_hotkey() # Clean up hotkey if start failed
 
 
+    def create_document(self, case_name):
+        doc = Document()
+
+        # Add Header
+        if len(doc.sections) > 0:
+             header = doc.sections[0].header;
+             # Clear any existing content in the header
+             for para in header.paragraphs:
+                 para._p.getparent().remove(para._p)
+             hp = header.add_paragraph();
+             hr = hp.add_run(f"Test Case: {case_name}"); hr.font.name = 'Arial'; hr.font.size = Pt(12); hr.bold = True;
+             hp.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        else:
+            logging.warning("Cannot add header: Document has no sections.")
+        return doc
+
+
     def append_to_existing(self):
          options = QFileDialog.Options()
          # Use user's Documents folder as a starting point if possible
@@ -512,39 +878,44 @@ class ScreenshotApp(QWidget):
 
          try:
              self.doc_path = file_path
-             # Attempt to open the document
-             try:
-                 self.doc = Document(self.doc_path)
-             except Exception as doc_open_e:
-                 logging.error(f"Failed to open selected Word document '{self.doc_path}': {doc_open_e}", exc_info=True)
-                 QMessageBox.critical(self, "File Error", f"Could not open the selected Word document.\nIt might be corrupted, password-protected, or not a valid .docx file.\n\nError: {doc_open_e}")
-                 self.unregister_hotkey() # Unregister hotkey if file fails
-                 return
-
-             # Find the last screenshot number to continue incrementing
-             max_screenshot_num = 0;
-             pattern = re.compile(r"Screenshot\s+(\d+)", re.IGNORECASE) # Regex to find "Screenshot N"
-             if self.doc.paragraphs: # Check if document has paragraphs
-                 # Iterate backwards for potentially faster finding of the last entry
-                 for p in reversed(self.doc.paragraphs):
-                     match = pattern.search(p.text);
-                     if match:
-                         try:
-                             num = int(match.group(1))
-                             max_screenshot_num = max(max_screenshot_num, num)
-                             # Optimization: If we find one, we can potentially break
-                             # if numbers are strictly sequential, but let's check all
-                             # just in case they are out of order.
-                             # break # Uncomment if strict sequential numbering is assumed
-                         except ValueError:
-                             pass # Ignore if the number part isn't a valid integer
-             self.screenshot_count = max_screenshot_num + 1;
-             logging.info(f"Determined starting screenshot number for append: {self.screenshot_count}")
+             self.doc = None; self.doc_future = None
+             # --- Fast path: numbering and page width from the sidecar written at the last save ---
+             metadata = self.read_session_metadata(self.doc_path)
+             if metadata:
+                 # The document itself is parsed on a worker; the writer waits for it before the first insert
+                 self.doc_future = self.encode_pool.submit(Document, self.doc_path)
+                 self.screenshot_count = metadata["next_screenshot"]
+                 picture_width = metadata["picture_width_inches"]
+                 previous_images = metadata.get("images", [])
+                 logging.info(f"Starting screenshot number for append from session metadata: {self.screenshot_count}")
+             else:
+                 previous_images = []
+                 # Attempt to open the document
+                 try:
+                     self.doc = Document(self.doc_path)
+                 except Exception as doc_open_e:
+                     logging.error(f"Failed to open selected Word document '{self.doc_path}': {doc_open_e}", exc_info=True)
+                     QMessageBox.critical(self, "File Error", f"Could not open the selected Word document.\nIt might be corrupted, password-protected, or not a valid .docx file.\n\nError: {doc_open_e}")
+                     self.unregister_hotkey() # Unregister hotkey if file fails
+                     return
+                 self.screenshot_count = self.scan_last_screenshot_number(self.doc) + 1
+                 picture_width = self.picture_width_inches(self.doc)
+                 logging.info(f"Determined starting screenshot number for append: {self.screenshot_count}")
 
              self.capture_enabled = True;
              self.captured_data = []; # Reset lists for new captures in this session
              self.captured_images = [];
+             self.previous_session_images = previous_images
              self.delete_images_after_save = self.delete_checkbox.isChecked()
+             self.capture_codec = self.current_codec_settings()
+             self.embed_dpi = self.embed_dpi_spin.value()
+             self.embed_width_px = round(picture_width * self.embed_dpi) if self.embed_dpi else 0
+             self.dedup_mode = self.dedup_combo.currentText().lower(); self.recent_hashes.clear()
+             self.excel_thumbnails = OPENPYXL_AVAILABLE and self.generate_excel_checkbox.isChecked()
+             # Earlier captures from the metadata count as "recent" for near-duplicate checks (hash only, so a match is only logged)
+             for image in previous_images:
+                 if image.get("phash") is not None:
+                     self.recent_hashes.setdefault(image.get("dedup_key") or "screen", deque(maxlen=DEDUP_WINDOW)).append((image["phash"], image["co"], None))
 
              current_hotkey = getattr(self, 'registered_hotkey', None);
              status_suffix = f"(Hotkey: {current_hotkey})" if current_hotkey else "(Hotkey Disabled)"
@@ -560,6 +931,7 @@ class ScreenshotApp(QWidget):
              # Define Excel path based on appended document name
              base_filename = os.path.splitext(os.path.basename(self.doc_path))[0];
              self.excel_path = os.path.join(os.path.dirname(self.doc_path), f"{base_filename}_appended_data.xlsx") # Changed Excel name slightly
+             self.open_session_journal("append", base_filename)
 
              # --- Hide Taskbar if checked ---
              self.taskbar_hidden = False # Reset flag
@@ -571,12 +943,13 @@ class ScreenshotApp(QWidget):
                       logging.warning("Attempted to hide taskbar, but failed (set_taskbar_visibility returned False).")
 
 
-             logging.info(f"Ready to append to: {self.doc_path}, Start Count: {self.screenshot_count}, Del Img: {self.delete_images_after_save}, Taskbar Hidden: {self.taskbar_hidden}, Excel Path: {self.excel_path}, Hotkey: {current_hotkey if current_hotkey else 'N/A'}")
+             logging.info(f"Ready to append to: {self.doc_path}, Start Count: {self.screenshot_count}, Codec: {self.capture_codec['label']}, Embed: {self.embed_width_px or 'full'} px, Dedup: {self.dedup_mode}, Del Img: {self.delete_images_after_save}, Taskbar Hidden: {self.taskbar_hidden}, Excel Path: {self.excel_path}, Hotkey: {current_hotkey if current_hotkey else 'N/A'}")
 
          except Exception as e:
              logging.error(f"Error during append_to_existing setup: {e}", exc_info=True)
              QMessageBox.critical(self, "Append Error", f"An unexpected error occurred setting up the append operation:\n{e}")
-             self.doc_path = None; self.doc = None; self.capture_enabled = False;
+             self.close_session_journal(keep=False)
+             self.doc_path = None; self.doc = None; self.doc_future = None; self.capture_enabled = False;
              # Reset UI
              self.stop_button.setEnabled(False)
              self.start_button.setEnabled(True)
@@ -585,6 +958,86 @@ class ScreenshotApp(QWidget):
              self.unregister_hotkey() # Clean up hotkey
 
 
+    def scan_last_screenshot_number(self, doc):
+        # Slow path for documents without session metadata: find the last "Screenshot N" in the text
+        max_screenshot_num = 0;
+        pattern = re.compile(r"Screenshot\s+(\d+)", re.IGNORECASE) # Regex to find "Screenshot N"
+        if doc.paragraphs: # Check if document has paragraphs
+            # Iterate backwards for potentially faster finding of the last entry
+            for p in reversed(doc.paragraphs):
+                match = pattern.search(p.text);
+                if match:
+                    try:
+                        num = int(match.group(1))
+                        max_screenshot_num = max(max_screenshot_num, num)
+                        # Optimization: If we find one, we can potentially break
+                        # if numbers are strictly sequential, but let's check all
+                        # just in case they are out of order.
+                        # break # Uncomment if strict sequential numbering is assumed
+                    except ValueError:
+                        pass # Ignore if the number part isn't a valid integer
+        return max_screenshot_num
+
+
+    def session_metadata_path(self, doc_path):
+        return os.path.splitext(doc_path)[0] + ".session.json"
+
+
+    def read_session_metadata(self, doc_path):
+        # Returns the sidecar written at the last save, or None if missing or the .docx changed since (e.g. edited in Word)
+        metadata_path = self.session_metadata_path(doc_path)
+        if not os.path.exists(metadata_path):
+            logging.info(f"No session metadata for '{doc_path}'; falling back to paragraph scan.")
+            return None
+        try:
+            with open(metadata_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+            doc_stat = os.stat(doc_path)
+            if metadata.get("doc_size") != doc_stat.st_size or metadata.get("doc_mtime_ns") != doc_stat.st_mtime_ns:
+                logging.info(f"Session metadata for '{doc_path}' is stale (document modified since); falling back to paragraph scan.")
+                return None
+            int(metadata["next_screenshot"]); float(metadata["picture_width_inches"])
+            return metadata
+        except Exception as e:
+            logging.warning(f"Unusable session metadata '{metadata_path}': {e}; falling back to paragraph scan.")
+            return None
+
+
+    def write_session_metadata(self):
+        metadata_path = self.session_metadata_path(self.doc_path)
+        try:
+            doc_stat = os.stat(self.doc_path)
+            metadata = {"format": 1, "document": os.path.basename(self.doc_path),
+                        "doc_size": doc_stat.st_size, "doc_mtime_ns": doc_stat.st_mtime_ns,
+                        "next_screenshot": self.screenshot_count,
+                        "picture_width_inches": self.picture_width_inches(self.doc),
+                        "images": self.previous_session_images + [
+                            {"co": d.get("co"), "description": d.get("description"), "image_path": d.get("image_path"), "phash": d.get("phash"), "dedup_key": d.get("dedup_key")}
+                            for d in self.captured_data]}
+            with open(metadata_path, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, indent=1)
+            logging.info(f"Session metadata written: {metadata_path}")
+        except Exception as e:
+            # Only costs a paragraph scan on the next append
+            logging.error(f"Could not write session metadata '{metadata_path}': {e}", exc_info=True)
+
+
+    def ensure_document_loaded(self):
+        # Append via session metadata opens the .docx on a worker; block on it only when it is actually needed
+        # doc_future is only cleared once doc is set, so capture_screenshot never sees both as None mid-handoff.
+        # The writer thread and stop_capture can both get here; the lock makes one of them do the handoff.
+        with self.doc_load_lock:
+            if self.doc is not None or self.doc_future is None: return
+            try:
+                self.doc = self.doc_future.result()
+                logging.info(f"Background load of '{self.doc_path}' finished.")
+            except Exception as doc_open_e:
+                logging.error(f"Failed to open selected Word document '{self.doc_path}': {doc_open_e}", exc_info=True)
+                self.capture_failed.emit(True, "File Error", f"Could not open the selected Word document.\nIt might be corrupted, password-protected, or not a valid .docx file.\nCaptures will not be added to it.\n\nError: {doc_open_e}")
+            finally:
+                self.doc_future = None
+
+
     def stop_capture(self):
         if not self.capture_enabled:
             logging.warning("Stop capture called, but capture was not enabled.")
@@ -593,6 +1046,7 @@ class ScreenshotApp(QWidget):
         try:
             logging.info("Stop capture initiated.")
             self.capture_enabled = False;
+            self.stop_timed_captures()
             self.unregister_hotkey() # Always try to unregister the hotkey
 
             # --- Restore Taskbar if it was hidden by this app ---
@@ -607,12 +1061,17 @@ class ScreenshotApp(QWidget):
             pdf_enable = False # Default to disabled
             save_successful = False # Track save status
 
+            # --- Let queued captures finish encoding and reach the document before saving ---
+            self.wait_for_pending_captures()
+            self.ensure_document_loaded()
+
             if self.doc and self.doc_path:
                 logging.info(f"Attempting to save Word document to: {self.doc_path}")
                 try:
                     # --- Attempt to save the document ---
                     self.doc.save(self.doc_path);
                     save_successful = True # Mark save as successful
+                    self.write_session_metadata() # Lets the next append skip the paragraph scan
                     status_msg = f"Capture complete. Word saved: {os.path.basename(self.doc_path)}";
                     logging.info(f"Word document saved successfully: {self.doc_path}")
 
@@ -620,13 +1079,12 @@ class ScreenshotApp(QWidget):
                     if self.generate_excel_checkbox.isChecked():
                         if OPENPYXL_AVAILABLE and self.captured_data:
                             logging.info("Generating Excel document...")
-                            self.generate_excel() # This function handles its own errors/messages
-                            # Check if excel_path exists after generation attempt
-                            if self.excel_path and os.path.exists(self.excel_path):
-                                status_msg += f" | Excel saved: {os.path.basename(self.excel_path)}"
+                            self.excel_status_base = status_msg # on_excel_finished appends the result to this
+                            # Written on the encode pool; this function handles its own errors/messages
+                            if self.generate_excel():
+                                status_msg += " | Excel: writing index..."
                             else:
                                 status_msg += " | Excel generation failed (see log)"
-                                logging.warning("Excel generation was checked, but Excel file path is not set or file doesn't exist after generation attempt.")
                         elif not OPENPYXL_AVAILABLE:
                             status_msg += " | Excel skipped (library missing)"
                             logging.warning("Excel generation skipped - 'openpyxl' library not available.")
@@ -656,6 +1114,8 @@ class ScreenshotApp(QWidget):
                 logging.warning("Stop capture called, but self.doc or self.doc_path was None/Empty.")
                 pdf_enable = False
 
+            # --- The journal is only needed until the document is safely on disk ---
+            self.close_session_journal(keep=not save_successful)
 
             # --- Set PDF Button State ---
             # Condition: Library must be available AND Word save must have succeeded
@@ -696,6 +1156,129 @@ class ScreenshotApp(QWidget):
             self.stop_button.setEnabled(False)
             if DOCX2PDF_AVAILABLE: self.convert_pdf_button.setEnabled(False) # Ensure PDF button is off on error
             self.taskbar_hidden = False # Assume taskbar should be shown
+            self.close_session_journal(keep=True)
+
+
+    def open_session_journal(self, mode, case_name):
+        self.close_session_journal(keep=True)
+        try:
+            os.makedirs(SESSION_JOURNAL_DIR, exist_ok=True)
+            base_filename = os.path.splitext(os.path.basename(self.doc_path))[0]
+            stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.session_journal_path = os.path.join(SESSION_JOURNAL_DIR, f"{base_filename}_{stamp}.jsonl")
+            self.session_journal = open(self.session_journal_path, "a", encoding="utf-8")
+            self.write_journal_record({"type": "session", "mode": mode, "doc_path": self.doc_path, "excel_path": self.excel_path,
+                                       "case_name": case_name, "start_count": self.screenshot_count,
+                                       "started": datetime.datetime.now().isoformat(timespec="seconds")})
+            logging.info(f"Session journal opened: {self.session_journal_path}")
+        except Exception as e:
+            # Capture still works without a journal, it just can't be recovered after a crash
+            logging.error(f"Could not open session journal in '{SESSION_JOURNAL_DIR}': {e}", exc_info=True)
+            self.session_journal = None; self.session_journal_path = None
+
+
+    def write_journal_record(self, record):
+        if self.session_journal is None: return
+        try:
+            self.session_journal.write(json.dumps(record) + "\n")
+            self.session_journal.flush()
+            os.fsync(self.session_journal.fileno())
+        except Exception as e:
+            logging.error(f"Error writing session journal record: {e}", exc_info=True)
+
+
+    def close_session_journal(self, keep):
+        if self.session_journal is not None:
+            try:
+                self.session_journal.close()
+            except Exception as e:
+                logging.error(f"Error closing session journal: {e}")
+        self.session_journal = None
+        if self.session_journal_path and not keep:
+            try:
+                os.remove(self.session_journal_path)
+                logging.info(f"Session journal removed after successful save: {self.session_journal_path}")
+            except OSError as e:
+                logging.warning(f"Could not remove session journal '{self.session_journal_path}': {e}")
+        elif self.session_journal_path:
+            logging.info(f"Session journal kept for recovery: {self.session_journal_path}")
+        self.session_journal_path = None
+
+
+    def read_session_journal(self, journal_path):
+        records = []
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A crash can leave the final line half written; everything before it is still valid
+                    logging.warning(f"Skipping unreadable line in session journal {journal_path}")
+        if not records or records[0].get("type") != "session":
+            raise ValueError("Journal has no session header.")
+        return records[0], [r for r in records[1:] if r.get("type") == "capture"]
+
+
+    def recover_interrupted_sessions(self):
+        if not os.path.isdir(SESSION_JOURNAL_DIR): return
+        journals = sorted(os.path.join(SESSION_JOURNAL_DIR, name) for name in os.listdir(SESSION_JOURNAL_DIR) if name.endswith(".jsonl"))
+        for journal_path in journals:
+            try:
+                session, captures = self.read_session_journal(journal_path)
+            except Exception as e:
+                logging.error(f"Unreadable session journal '{journal_path}': {e}", exc_info=True)
+                continue
+            if not captures:
+                logging.info(f"Removing empty session journal: {journal_path}")
+                try: os.remove(journal_path)
+                except OSError: pass
+                continue
+
+            reply = QMessageBox.question(self, "Recover Capture Session",
+                                         f"A capture session for '{os.path.basename(session['doc_path'])}' (started {session.get('started', '?')}) "
+                                         f"was not saved.\n{len(captures)} screenshot(s) can be recovered from the images on disk.\n\n"
+                                         f"Yes: rebuild the Word document now\nNo: ask again next launch\nDiscard: forget this session",
+                                         QMessageBox.Yes | QMessageBox.No | QMessageBox.Discard, QMessageBox.Yes)
+            if reply == QMessageBox.Discard:
+                logging.info(f"User discarded session journal: {journal_path}")
+                os.remove(journal_path)
+            elif reply == QMessageBox.Yes:
+                self.rebuild_document_from_journal(journal_path, session, captures)
+
+
+    def rebuild_document_from_journal(self, journal_path, session, captures):
+        doc_path = session["doc_path"]
+        logging.info(f"Rebuilding '{doc_path}' from journal {journal_path} ({len(captures)} captures)")
+        try:
+            # Append sessions never saved over the original, so it is still the right base document
+            if session.get("mode") == "append" and os.path.exists(doc_path):
+                self.doc = Document(doc_path)
+            else:
+                self.doc = self.create_document(session.get("case_name") or "Evidence")
+            self.doc_path = doc_path
+            self.excel_path = session.get("excel_path")
+            self.captured_data = []; self.captured_images = []
+            self.embed_dpi = self.embed_dpi_spin.value()
+            target_width = round(self.picture_width_inches(self.doc) * self.embed_dpi) if self.embed_dpi else 0
+            for record in captures:
+                picture_source = None
+                if os.path.exists(record["image_path"]):
+                    extension = os.path.splitext(record["image_path"])[1].lower()
+                    codec = {"format": {".jpg": "JPG", ".webp": "WEBP"}.get(extension, "PNG"), "quality": DEFAULT_JPEG_QUALITY}
+                    picture_source = self.build_embed_copy(QImage(record["image_path"]), codec, target_width)
+                self.add_to_word(record["image_path"], record["word_description"], new_page=record.get("new_page", False), picture_source=picture_source)
+                self.captured_images.append(record["image_path"])
+                self.captured_data.append({"co": record["co"], "description": record["description"], "image_path": record["image_path"], "phash": record.get("phash"), "dedup_key": record.get("dedup_key")})
+            self.doc.save(doc_path)
+            os.remove(journal_path)
+            self.status_label.setText(f"Status: Recovered {len(captures)} screenshot(s) into {os.path.basename(doc_path)}")
+            if DOCX2PDF_AVAILABLE: self.convert_pdf_button.setEnabled(True)
+            logging.info(f"Recovered session saved to {doc_path}; journal removed.")
+            QMessageBox.information(self, "Session Recovered", f"Recovered {len(captures)} screenshot(s) into:\n{doc_path}")
+        except Exception as e:
+            logging.error(f"Failed to rebuild document from journal '{journal_path}': {e}", exc_info=True)
+            QMessageBox.critical(self, "Recovery Failed", f"Could not rebuild the Word document from the saved session.\nThe journal was kept for another attempt.\n\nError: {e}")
+            self.doc = None; self.doc_path = None
 
 
     def convert_to_pdf(self):
@@ -798,125 +1381,229 @@ class ScreenshotApp(QWidget):
 
 
     def generate_excel(self):
-        # Pre-checks moved to stop_capture, but keep internal checks just in case
+        # Runs on the GUI thread: checks, then hands a snapshot of the session to write_excel_index on the encode pool.
+        # Returns True if the index is being written; completion arrives through excel_finished.
         if not OPENPYXL_AVAILABLE:
             QMessageBox.critical(self, "Excel Generation Failed", "'openpyxl' library is not installed.\nPlease install it (`pip install openpyxl`).")
             logging.error("Generate Excel called, but OPENPYXL_AVAILABLE is False.")
-            return
+            return False
         if not self.excel_path:
             logging.error("Generate Excel called, but self.excel_path is not set.")
             QMessageBox.warning(self, "Excel Error", "Cannot generate Excel because the output file path has not been set.")
-            return
+            return False
         if not self.captured_data:
             logging.warning("Generate Excel called, but self.captured_data is empty.")
             QMessageBox.information(self, "No Data", "No screenshot data was captured to put into an Excel file.")
-            return
+            return False
 
-        logging.info(f"Generating Excel file at: {self.excel_path}")
-        try:
-            workbook = openpyxl.Workbook();
-            sheet = workbook.active;
-            sheet.title = "Screenshots";
-            # Add header row
-            sheet.append(["Screenshot No.", "Description", "Image"])
-            # Set column widths (adjust as needed)
-            sheet.column_dimensions['A'].width = 15; # Screenshot number
-            sheet.column_dimensions['B'].width = 40; # Description
-            sheet.column_dimensions['C'].width = 50  # Image column (width doesn't directly control image size)
+        # Links would only point at deleted files once cleanup has run
+        link_images = not self.delete_images_after_save
+        excel_dir = os.path.dirname(self.excel_path)
+        rows = []
+        for data in self.captured_data:
+            img_path = data.get("image_path")
+            file_name = os.path.basename(img_path) if img_path else "[No image path]"
+            link_target = None
+            if link_images and img_path and os.path.exists(img_path):
+                try:
+                    link_target = os.path.relpath(img_path, excel_dir) # Relative, so the folder can be moved as a whole
+                except ValueError:
+                    link_target = img_path # Different drive on Windows
+            rows.append((data.get("co", "N/A"), data.get("description", ""), data.get("size"), data.get("thumbnail"), file_name, link_target))
+
+        logging.info(f"Writing Excel index with {len(rows)} row(s) in the background: {self.excel_path}")
+        excel_path = self.excel_path
+        excel_future = self.encode_pool.submit(self.write_excel_index, excel_path, rows)
+        excel_future.add_done_callback(lambda future: self.excel_finished.emit(excel_path, self.excel_error_message(future, excel_path)))
+        return True
 
-            # Freeze header row
-            sheet.freeze_panes = 'A2'
 
-            # Style for headers (optional)
-            header_font = openpyxl.styles.Font(bold=True)
-            header_alignment = openpyxl.styles.Alignment(horizontal='center')
-            for cell in sheet["1:1"]:
-                cell.font = header_font
-                cell.alignment = header_alignment
+    def write_excel_index(self, excel_path, rows):
+        # Runs on an encode pool thread. Thumbnails and sizes were recorded at capture time, so no image file is opened here.
+        write_start = time.perf_counter()
+        workbook = openpyxl.Workbook(write_only=True); # Rows are streamed out instead of held as cell objects
+        sheet = workbook.create_sheet("Screenshots");
+        # Set column widths (adjust as needed)
+        sheet.column_dimensions['A'].width = 15; # Screenshot number
+        sheet.column_dimensions['B'].width = 40; # Description
+        sheet.column_dimensions['C'].width = 50  # Image column (width doesn't directly control image size)
+        sheet.column_dimensions['D'].width = 30; # Link to the full-size file
+        # Freeze header row
+        sheet.freeze_panes = 'A2'
+
+        header_font = openpyxl.styles.Font(bold=True)
+        header_alignment = openpyxl.styles.Alignment(horizontal='center')
+        header = []
+        for title in ("Screenshot No.", "Description", "Image", "File"):
+            cell = WriteOnlyCell(sheet, value=title); cell.font = header_font; cell.alignment = header_alignment
+            header.append(cell)
+        sheet.append(header)
+
+        co_alignment = openpyxl.styles.Alignment(horizontal='center', vertical='center')
+        desc_alignment = openpyxl.styles.Alignment(vertical='top', wrap_text=True)
+        link_font = openpyxl.styles.Font(color="0563C1", underline="single")
+        for row_num, (co, description, size, thumbnail, file_name, link_target) in enumerate(rows, start=2): # Start from row 2
+            cell_co = WriteOnlyCell(sheet, value=co); cell_co.alignment = co_alignment
+            cell_desc = WriteOnlyCell(sheet, value=description); cell_desc.alignment = desc_alignment
+            cell_file = WriteOnlyCell(sheet, value=file_name)
+            if link_target:
+                cell_file.hyperlink = link_target; cell_file.font = link_font
+            cell_img = WriteOnlyCell(sheet)
+            if thumbnail and size and size[0] > 0 and size[1] > 0:
+                # Displayed at EXCEL_THUMB_HEIGHT, aspect ratio taken from the full-size capture
+                img = ExcelImage(io.BytesIO(thumbnail))
+                img.height = EXCEL_THUMB_HEIGHT
+                img.width = EXCEL_THUMB_HEIGHT * size[0] / size[1]
+                img.anchor = f"C{row_num}"
+                sheet.add_image(img)
+                # Row height in points (1/72 inch) from the image height in pixels (96 DPI)
+                sheet.row_dimensions[row_num].height = EXCEL_THUMB_HEIGHT * 72 / 96
+            else:
+                cell_img.value = "[No thumbnail]"
+            sheet.append([cell_co, cell_desc, cell_img, cell_file])
 
+        workbook.save(excel_path);
+        logging.info(f"Excel file generated successfully: {excel_path} ({len(rows)} rows, {time.perf_counter() - write_start:.1f} s)")
 
-            img_height_pixels = 200 # Approx desired image height in Excel
 
+    def excel_error_message(self, future, excel_path):
+        # Empty string on success; called from the pool thread when write_excel_index finishes
+        e = future.exception()
+        if e is None:
+            return ""
+        logging.error(f"Error generating Excel file '{excel_path}': {e}", exc_info=e)
+        if isinstance(e, PermissionError):
+            return f"Failed to save Excel file due to permissions.\nCheck if the file is open elsewhere or if you have write access.\nPath: {excel_path}\n\nError: {e}"
+        return f"An unexpected error occurred generating the Excel file:\n{e}"
 
-            for row_num, data in enumerate(self.captured_data, start=2): # Start from row 2
-                # Add screenshot number and description
-                cell_co = sheet.cell(row=row_num, column=1, value=data.get("co", "N/A"))
-                cell_co.alignment = openpyxl.styles.Alignment(horizontal='center', vertical='center')
 
-                cell_desc = sheet.cell(row=row_num, column=2, value=data.get("description", ""))
-                cell_desc.alignment = openpyxl.styles.Alignment(vertical='top', wrap_text=True)
+    def on_excel_finished(self, excel_path, error_message):
+        if error_message:
+            QMessageBox.critical(self, "Excel Generation Failed", error_message);
+            excel_status = "Excel generation failed (see log)"
+        else:
+            excel_status = f"Excel saved: {os.path.basename(excel_path)}"
+        # Don't overwrite the status of a session started while the index was being written
+        if not self.capture_enabled:
+            self.status_label.setText(f"{self.excel_status_base} | {excel_status}")
 
-                img_path = data.get("image_path")
-                if img_path and os.path.exists(img_path):
-                    try:
-                        # Insert image
-                        img = ExcelImage(img_path)
-
-                        # --- Resize image proportionally to fit target height ---
-                        try:
-                            with Image.open(img_path) as pil_img:
-                                w_px, h_px = pil_img.size
-                                if h_px > 0 and w_px > 0: # Avoid division by zero
-                                    aspect = w_px / h_px
-                                    img.height = img_height_pixels
-                                    img.width = img_height_pixels * aspect
-                                else: # Handle zero dimension images? Set default size.
-                                    img.width=100
-                                    img.height=100
-                                    logging.warning(f"Image has zero dimension: {img_path}")
-                        except Exception as pil_e:
-                            logging.error(f"PIL error processing image {img_path} for resizing: {pil_e}")
-                            # Use default size if PIL fails
-                            img.width=150
-                            img.height=100
-
-                        # Anchor image to the cell in column C
-                        cell_ref = sheet.cell(row=row_num, column=3).coordinate
-                        img.anchor = cell_ref;
-                        sheet.add_image(img);
-
-                        # Adjust row height to fit the image (convert pixels to points)
-                        # Excel uses points (1/72 inch), screen uses pixels (often 96 DPI)
-                        row_h_pts = img.height * 72 / 96
-                        sheet.row_dimensions[row_num].height = max(row_h_pts, 20) # Ensure a minimum height
-
-                        logging.info(f"Added image '{os.path.basename(img_path)}' to Excel row {row_num}")
-
-                    except Exception as img_e:
-                        logging.error(f"Error adding image '{img_path}' to Excel row {row_num}: {img_e}", exc_info=True)
-                        sheet.cell(row=row_num, column=3, value=f"[Error adding image: {img_e}]")
-                elif img_path:
-                    logging.warning(f"Image file not found, cannot add to Excel: {img_path}")
-                    sheet.cell(row=row_num, column=3, value="[Image file not found]")
-                else:
-                    logging.warning(f"No image path provided for data in row {row_num}.")
-                    sheet.cell(row=row_num, column=3, value="[No image path]")
+
+    def on_capture_trigger(self):
+        mode = self.trigger_mode_combo.currentText()
+        if mode.startswith("Burst"):
+            self.start_burst()
+        elif mode.startswith("Interval"):
+            self.toggle_interval_capture()
+        else:
+            self.capture_screenshot()
 
 
-            # Save the workbook
-            workbook.save(self.excel_path);
-            logging.info(f"Excel file generated successfully: {self.excel_path}")
-            # Optional: Notify user success (already done in stop_capture status)
-            # QMessageBox.information(self, "Excel Generated", f"Excel document generated successfully:\n{self.excel_path}");
+    def pending_grab_bytes(self):
+        with self.pending_grabs_lock:
+            return sum(size for size, _ in self.pending_grabs.values())
 
-        except PermissionError as e:
-            error_message = f"Failed to save Excel file due to permissions.\nCheck if the file is open elsewhere or if you have write access.\nPath: {self.excel_path}\n\nError: {e}";
-            # self.status_label.setText("Status: Error generating Excel (Permission Denied)."); # Status already updated in stop_capture
-            QMessageBox.critical(self, "Excel Save Failed", error_message);
-            logging.error(error_message, exc_info=True)
-        except Exception as e:
-            error_message = f"An unexpected error occurred generating the Excel file:\n{e}";
-            # self.status_label.setText("Status: Error generating Excel."); # Status already updated in stop_capture
-            QMessageBox.critical(self, "Excel Generation Failed", error_message);
-            logging.error(f"Error generating Excel file '{self.excel_path}': {e}", exc_info=True)
 
+    def release_pending_grab(self, grab_key):
+        with self.pending_grabs_lock:
+            entry = self.pending_grabs.get(grab_key)
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] <= 0: del self.pending_grabs[grab_key]
 
-    def capture_screenshot(self):
+
+    def capture_backlog_full(self):
+        # Backpressure for every capture: don't grab more frames (or more raw pixel memory) than the encoder can hold
+        pending_bytes = self.pending_grab_bytes()
+        if self.capture_queue.unfinished_tasks < CAPTURE_RING_FRAMES and pending_bytes < CAPTURE_RING_BYTES:
+            self.backpressure_logged = False
+            return False
+        if not self.backpressure_logged:
+            logging.warning(f"Encoder behind ({self.capture_queue.unfinished_tasks} frames, {pending_bytes / (1024 * 1024):.0f} MB pending); deferring captures.")
+            self.status_label.setText(f"Status: Encoder catching up ({self.capture_queue.unfinished_tasks} pending)...")
+            self.backpressure_logged = True
+        return True
+
+
+    def start_burst(self):
+        if self.burst_timer.isActive():
+            logging.info("Burst trigger ignored: a burst is already running.")
+            return
+        if not self.capture_enabled:
+            logging.warning("Burst trigger ignored: Capture not currently enabled.")
+            return
+        self.burst_frame = 0; self.burst_queued = 0
+        self.burst_frames_total = self.burst_frames_spin.value()
+        logging.info(f"Starting burst: {self.burst_frames_total} frames every {self.burst_interval_spin.value()} ms as Screenshot {self.screenshot_count}")
+        self.burst_timer.start(self.burst_interval_spin.value())
+        self.burst_tick() # First frame right away
+
+
+    def burst_tick(self):
+        if not self.capture_enabled:
+            self.burst_timer.stop()
+            return
+        if self.capture_backlog_full():
+            return # Frame is taken on a later tick once the encoder catches up
+        self.burst_frame += 1
+        if self.capture_screenshot(frame=self.burst_frame, frames_total=self.burst_frames_total):
+            self.burst_queued += 1
+        if self.burst_frame >= self.burst_frames_total:
+            self.burst_timer.stop()
+            # All frames of the burst share one screenshot number, so it only moves on once the burst ends
+            if self.burst_queued:
+                increment_value = self.increment_spin.value() if self.increment_checkbox.isChecked() else 1
+                self.status_label.setText(f"Status: Burst Screenshot {self.screenshot_count} captured ({self.burst_queued} frames, {self.capture_queue.unfinished_tasks} pending).")
+                self.screenshot_count += increment_value
+            logging.info(f"Burst finished: {self.burst_queued}/{self.burst_frames_total} frames queued. Next base count will be: {self.screenshot_count}")
+
+
+    def toggle_interval_capture(self):
+        if self.interval_timer.isActive():
+            self.finish_interval_capture()
+            self.status_label.setText(f"Status: Interval capture stopped ({self.interval_queued} frames).")
+        elif self.capture_enabled:
+            self.interval_frame = 0; self.interval_queued = 0
+            self.interval_timer.start(self.burst_interval_spin.value())
+            logging.info(f"Interval capture started: every {self.burst_interval_spin.value()} ms as Screenshot {self.screenshot_count}")
+            self.interval_tick()
+
+
+    def interval_tick(self):
+        if not self.capture_enabled:
+            self.finish_interval_capture()
+            return
+        if self.capture_backlog_full():
+            return # Skip this tick; the interval effectively stretches while the encoder is behind
+        # Like a burst, every frame of one interval run is grouped under the current screenshot number
+        self.interval_frame += 1
+        if self.capture_screenshot(frame=self.interval_frame):
+            self.interval_queued += 1
+
+
+    def finish_interval_capture(self):
+        if not self.interval_timer.isActive(): return
+        self.interval_timer.stop()
+        if self.interval_queued:
+            increment_value = self.increment_spin.value() if self.increment_checkbox.isChecked() else 1
+            self.screenshot_count += increment_value
+        logging.info(f"Interval capture stopped: {self.interval_queued} frames queued. Next base count will be: {self.screenshot_count}")
+
+
+    def stop_timed_captures(self):
+        if self.burst_timer.isActive() or self.interval_timer.isActive():
+            logging.info("Stopping running burst/interval capture.")
+        self.burst_timer.stop(); self.finish_interval_capture()
+
+
+    def capture_screenshot(self, frame=None, frames_total=None):
+        # frame is set for burst and interval frames, which share the current screenshot number;
+        # frames_total is only known for bursts.
+        # Returns True if at least one image was queued.
         # --- Pre-capture checks ---
         if not self.capture_enabled:
             logging.warning("Screenshot trigger ignored: Capture not currently enabled.")
             return
-        if self.doc is None:
+        if self.doc is None and self.doc_future is None:
             logging.warning("Screenshot trigger ignored: No active Word document object.")
             # Should we stop capture here? Maybe just warn.
             QMessageBox.warning(self, "Capture Error", "Cannot capture screenshot: No active Word document. Please start or append first.")
@@ -928,43 +1615,55 @@ class ScreenshotApp(QWidget):
             QMessageBox.critical(self, "Folder Error", f"The selected output folder is invalid or no longer exists:\n{folder}\n\nPlease select a valid folder and restart capture.")
             self.stop_capture(); # Stop the capture process fully
             return
+        # Hotkey and button shots are held to the same frame/byte backlog cap as burst and interval frames;
+        # a rejected shot does not use up a screenshot number
+        if self.capture_backlog_full():
+            if frame is None:
+                logging.warning(f"Screenshot trigger rejected: encoder backlog full ({self.capture_queue.unfinished_tasks} pending).")
+                self.status_label.setText(f"Status: Capture rejected, encoder busy ({self.capture_queue.unfinished_tasks} pending). Try again in a moment.")
+            return
 
         # --- Prepare filenames and descriptions ---
         case_name = self.test_case_input.text().strip() or "Evidence";
         description = self.description_input.text().strip(); # Get description at time of capture
         current_count_base = self.screenshot_count # Base number for this trigger event
+        # Burst frames are labelled N.1, N.2, ... under the same screenshot number
+        count_label = current_count_base if frame is None else f"{current_count_base}.{frame}"
+        frame_text = f"{frame}/{frames_total}" if frames_total else f"{frame}"
+        frame_tag = "" if frame is None else f"Frame {frame_text}, "
+        frame_suffix = "" if frame is None else f"_F{frame:03d}"
 
         timestamp_str = ("_" + datetime.datetime.now().strftime("%Y%m%d_%H%M%S")) if self.timestamp_checkbox.isChecked() else ""
         # Sanitize description for use in filename (remove invalid chars)
         safe_description_part = re.sub(r'[\\/*?:"<>|]', "", description)[:50] # Limit length
         # Base filename structure
-        filename_base_template = f"{case_name}_SS{current_count_base}_{safe_description_part}{timestamp_str}".replace(" ", "_")
+        filename_base_template = f"{case_name}_SS{current_count_base}_{safe_description_part}{timestamp_str}{frame_suffix}".replace(" ", "_")
 
-        screens = QGuiApplication.screens()
+        # Screen list and geometries come from the topology cache (refreshed on screen add/remove/geometry change)
+        screens = self.screen_topology["screens"]; geometries = self.screen_topology["geometries"]
         if not screens:
             logging.error("No screens detected by QGuiApplication.")
             QMessageBox.warning(self, "Screen Error", "Could not detect any screens. Cannot capture.")
             return
 
         # --- Perform Capture based on Mode ---
+        # Every mode goes through grab_screen_rects: one grab of the bounding box, crops are views into it
         try:
             if self.capture_mode == "single":
                 selected_index = self.single_monitor_combo.currentData() # UserData holds the index
                 if selected_index is not None and 0 <= selected_index < len(screens):
-                    screen = screens[selected_index]; geometry = screen.geometry()
-                    logging.info(f"Capturing single monitor: Index={selected_index}, Name='{screen.name()}', Geometry={geometry}")
-
-                    # Use the specific screen's grabWindow for potentially better results on that monitor
-                    image = screen.grabWindow(0, int(geometry.x()), int(geometry.y()), int(geometry.width()), int(geometry.height()))
+                    geometry = geometries[selected_index]
+                    logging.info(f"Capturing single monitor: Index={selected_index}, Name='{screens[selected_index].name()}', Geometry={geometry}")
 
-                    if image.isNull():
-                        raise ValueError(f"grabWindow returned a null pixmap for single monitor index {selected_index}.")
+                    source_image, (image,) = self.grab_screen_rects([geometry])
 
-                    image_path = os.path.join(folder, f"{filename_base_template}_Monitor{selected_index + 1}.png")
-                    word_description = f"Screenshot {current_count_base} (Monitor {selected_index + 1}): {description}"
+                    image_path = os.path.join(folder, f"{filename_base_template}_Monitor{selected_index + 1}{self.capture_codec['extension']}")
+                    word_description = f"Screenshot {current_count_base} ({frame_tag}Monitor {selected_index + 1}): {description}"
 
                     # --- Save, Add to Word/Data, Update Preview ---
-                    self.process_and_save_capture(image, image_path, word_description, current_count_base, description)
+                    if not self.process_and_save_capture(image, image_path, word_description, count_label, description, source_image=source_image,
+                                                         dedup_key=f"monitor{selected_index + 1}"):
+                        return # Skipped as a near-duplicate; the screenshot number is not used up
 
                 else:
                     logging.error(f"Invalid monitor index selected for single capture: {selected_index}")
@@ -972,33 +1671,48 @@ class ScreenshotApp(QWidget):
                     return # Don't proceed with capture
 
             elif self.capture_mode == "all":
-                 # Calculate the bounding box of the entire virtual desktop
-                 all_x = min(s.geometry().x() for s in screens);
-                 all_y = min(s.geometry().y() for s in screens)
-                 all_right = max(s.geometry().right() for s in screens);
-                 all_bottom = max(s.geometry().bottom() for s in screens)
-                 # Ensure width/height are at least 1
-                 all_width = max(1, all_right - all_x + 1);
-                 all_height = max(1, all_bottom - all_y + 1)
-                 logging.info(f"Capturing all monitors stitched: Virtual Desktop Bounds=({all_x},{all_y}, W={all_width}, H={all_height})")
+                 bounds = self.screen_topology["bounds"]
+                 logging.info(f"Capturing all monitors stitched: Virtual Desktop Bounds=({bounds.x()},{bounds.y()}, W={bounds.width()}, H={bounds.height()})")
 
                  try:
-                      # Grab the entire virtual desktop area using the primary screen's context
-                      image = QGuiApplication.primaryScreen().grabWindow(0, int(all_x), int(all_y), int(all_width), int(all_height))
-                      if image.isNull():
-                          raise ValueError("grabWindow returned a null pixmap when capturing the 'all monitors' virtual desktop.")
+                      source_image, (image,) = self.grab_screen_rects([bounds])
                  except Exception as grab_e:
                       logging.error(f"Error during grabWindow for 'all monitors': {grab_e}", exc_info=True)
                       QMessageBox.critical(self, "Capture Error", f"Failed to capture the combined screen area for 'all monitors'.\nError: {grab_e}")
                       return # Stop if grab failed
 
-                 image_path = os.path.join(folder, f"{filename_base_template}_AllMonitors.png");
-                 word_description = f"Screenshot {current_count_base} (All Monitors): {description}";
+                 image_path = os.path.join(folder, f"{filename_base_template}_AllMonitors{self.capture_codec['extension']}");
+                 word_description = f"Screenshot {current_count_base} ({frame_tag}All Monitors): {description}";
 
                  # --- Save, Add to Word/Data, Update Preview ---
-                 self.process_and_save_capture(image, image_path, word_description, current_count_base, description)
+                 if not self.process_and_save_capture(image, image_path, word_description, count_label, description, source_image=source_image, dedup_key="all"):
+                     return # Skipped as a near-duplicate; the screenshot number is not used up
 
 
+            elif self.capture_mode in ("region", "window"):
+                 # Only the chosen rectangle is grabbed and encoded
+                 if self.capture_mode == "region":
+                     rect = self.capture_region; area_label = "Region"; file_label = "Region"
+                 else:
+                     rect = self.active_window_rect(); area_label = "Active Window"; file_label = "Window"
+                 if rect is not None:
+                     rect = rect.intersected(self.screen_topology["bounds"]) # Screens may have changed since it was chosen
+                 if rect is None or rect.isEmpty():
+                     logging.warning(f"{area_label} capture skipped: no valid on-screen rectangle ({rect}).")
+                     self.status_label.setText(f"Status: {area_label} capture skipped - " +
+                                               ("use 'Select Region...' first." if self.capture_mode == "region" else "no capturable foreground window."))
+                     return
+                 logging.info(f"Capturing {area_label}: {rect}")
+                 source_image, (image,) = self.grab_screen_rects([rect])
+
+                 image_path = os.path.join(folder, f"{filename_base_template}_{file_label}{self.capture_codec['extension']}")
+                 word_description = f"Screenshot {current_count_base} ({frame_tag}{area_label}): {description}"
+
+                 # --- Save, Add to Word/Data, Update Preview ---
+                 if not self.process_and_save_capture(image, image_path, word_description, count_label, description, source_image=source_image,
+                                                      dedup_key=file_label.lower()):
+                     return # Skipped as a near-duplicate; the screenshot number is not used up
+
             elif self.capture_mode == "multiple":
                  selected_indices = []
                  for i in range(self.multiple_monitor_list.count()):
@@ -1017,86 +1731,56 @@ class ScreenshotApp(QWidget):
 
                  logging.info(f"Starting multi-monitor capture (Crop Method) for indices: {selected_indices}")
 
-                 # --- Grab the entire virtual desktop ONCE ---
-                 all_x = min(s.geometry().x() for s in screens); all_y = min(s.geometry().y() for s in screens)
-                 all_right = max(s.geometry().right() for s in screens); all_bottom = max(s.geometry().bottom() for s in screens)
-                 all_width = max(1, all_right - all_x + 1); all_height = max(1, all_bottom - all_y + 1)
-                 logging.info(f"Multi-capture: Virtual desktop bounds=({all_x},{all_y}, W={all_width}, H={all_height})")
-
+                 # --- Grab the selected monitors' bounding box ONCE ---
                  try:
-                      virtual_desktop_pixmap = QGuiApplication.primaryScreen().grabWindow(0, int(all_x), int(all_y), int(all_width), int(all_height))
-                      if virtual_desktop_pixmap.isNull():
-                          raise ValueError("grabWindow returned a null pixmap for virtual desktop (multi-monitor base).")
-                      logging.info(f"Grabbed virtual desktop pixmap successfully: Size=({virtual_desktop_pixmap.width()}x{virtual_desktop_pixmap.height()})")
+                      source_image, monitor_images = self.grab_screen_rects([geometries[i] for i in selected_indices])
                  except Exception as grab_e:
-                      logging.error(f"FAILED to grab virtual desktop base image for multi-monitor crop: {grab_e}", exc_info=True)
+                      logging.error(f"FAILED to grab base image for multi-monitor crop: {grab_e}", exc_info=True)
                       QMessageBox.critical(self, "Capture Error", f"Failed the initial screen grab required for multi-monitor capture.\nError: {grab_e}")
                       return # Cannot proceed if the base grab failed
 
                  # --- Process each selected monitor ---
-                 captured_paths_multi = []; success_count = 0; error_during_multi = False
+                 success_count = 0; skipped_count = 0; error_during_multi = False
                  last_successful_path = None
 
-                 for i, monitor_index in enumerate(selected_indices):
-                     logging.info(f"--- Processing selected monitor index: {monitor_index} ---")
-                     # Re-validate index just in case screen list changed (unlikely but safe)
-                     if 0 <= monitor_index < len(screens):
-                         screen = screens[monitor_index]; geometry = screen.geometry()
-                         logging.info(f"Target Monitor: Name='{screen.name()}', Absolute Geometry={geometry}")
-
-                         # Calculate crop rectangle relative to the full virtual desktop grab
-                         # Ensure coordinates are integers
-                         crop_x = int(geometry.x() - all_x)
-                         crop_y = int(geometry.y() - all_y)
-                         crop_w = int(geometry.width())
-                         crop_h = int(geometry.height())
-                         crop_rect = QRect(crop_x, crop_y, crop_w, crop_h)
-                         logging.info(f"Calculated Crop Rect relative to virtual grab: {crop_rect}")
-
-                         # Generate filename specific to this monitor
-                         multi_filename = f"{filename_base_template}_Monitor{monitor_index + 1}.png"
-                         multi_image_path = os.path.join(folder, multi_filename)
-                         logging.info(f"Target save path for this monitor: {multi_image_path}")
-
-                         try:
-                              # Crop the image from the full grab
-                              image = virtual_desktop_pixmap.copy(crop_rect)
-                              if image.isNull():
-                                  raise ValueError(f"Cropped pixmap is null for monitor {monitor_index+1}. Crop Rect: {crop_rect}. Grabbed size: {virtual_desktop_pixmap.width()}x{virtual_desktop_pixmap.height()}")
-                              logging.info(f"Cropped pixmap size: {image.width()}x{image.height()}")
-
-                              # Define description for this specific monitor
-                              multi_word_desc = f"Screenshot {current_count_base} (Monitor {monitor_index + 1} of Multiple): {description}"
-                              sub_count_label = f"{current_count_base}-{success_count+1}" # Unique ID for Excel (e.g., 5-1, 5-2)
-
-                              # --- Save, Add to Word/Data ---
-                              # Note: Preview is updated only with the last successful image after the loop
-                              save_success = image.save(multi_image_path, "PNG")
-                              if not save_success:
-                                  raise IOError(f"QPixmap.save() returned False when trying to save {multi_image_path}")
-                              logging.info(f"Successfully saved cropped image: {multi_image_path}")
-
-                              # Add to Word (potentially add page break before subsequent images in multi-capture)
-                              self.add_to_word(multi_image_path, multi_word_desc, new_page=(success_count > 0))
-                              # Add to internal lists
-                              self.captured_images.append(multi_image_path)
-                              self.captured_data.append({"co": sub_count_label, "description": f"{description} (Monitor {monitor_index+1})", "image_path": multi_image_path})
-
-                              success_count += 1
-                              last_successful_path = multi_image_path # Store path for preview
-
-                         except Exception as multi_proc_e:
-                              logging.error(f"Error cropping or saving for monitor index {monitor_index} (Path: {multi_image_path}): {multi_proc_e}", exc_info=True)
-                              QMessageBox.warning(self, "Multi-Capture Error", f"Failed to process or save the screenshot for monitor {monitor_index+1}.\nCheck logs for details.\n\nError: {multi_proc_e}")
-                              error_during_multi = True
-                     else:
-                         logging.warning(f"Invalid monitor index {monitor_index} encountered during multi-capture processing loop. Skipping.")
-                         error_during_multi = True # Treat as an error condition
+                 for monitor_index, image in zip(selected_indices, monitor_images):
+                     logging.info(f"--- Processing selected monitor index: {monitor_index} (Crop: {image.width()}x{image.height()}) ---")
 
-                 # --- Update Preview after processing all selected monitors ---
+                     # Generate filename specific to this monitor
+                     multi_filename = f"{filename_base_template}_Monitor{monitor_index + 1}{self.capture_codec['extension']}"
+                     multi_image_path = os.path.join(folder, multi_filename)
+                     logging.info(f"Target save path for this monitor: {multi_image_path}")
+
+                     try:
+                          if image.isNull():
+                              raise ValueError(f"Cropped image is null for monitor {monitor_index+1}. Area: {geometries[monitor_index]}")
+
+                          # Define description for this specific monitor
+                          multi_word_desc = f"Screenshot {current_count_base} ({frame_tag}Monitor {monitor_index + 1} of Multiple): {description}"
+                          sub_count_label = f"{count_label}-{success_count+1}" # Unique ID for Excel (e.g., 5-1, 5-2)
+
+                          # --- Queue for encoding and Word/Data (page break before subsequent images) ---
+                          # The preview ends up on the last monitor as the writer processes them in order
+                          if not self.process_and_save_capture(image, multi_image_path, multi_word_desc, sub_count_label,
+                                                               f"{description} (Monitor {monitor_index+1})", new_page=(success_count > 0),
+                                                               source_image=source_image, dedup_key=f"monitor{monitor_index + 1}"):
+                              skipped_count += 1
+                              continue
+
+                          success_count += 1
+                          last_successful_path = multi_image_path # Store path for preview
+
+                     except Exception as multi_proc_e:
+                          logging.error(f"Error cropping or saving for monitor index {monitor_index} (Path: {multi_image_path}): {multi_proc_e}", exc_info=True)
+                          QMessageBox.warning(self, "Multi-Capture Error", f"Failed to process or save the screenshot for monitor {monitor_index+1}.\nCheck logs for details.\n\nError: {multi_proc_e}")
+                          error_during_multi = True
+
+                 # --- Preview follows the pipeline; only the error states are shown here ---
                  if last_successful_path:
-                     self.update_preview(last_successful_path)
-                     logging.info(f"Multi-monitor capture finished. Preview updated with: {os.path.basename(last_successful_path)}")
+                     logging.info(f"Multi-monitor capture queued. Preview will show: {os.path.basename(last_successful_path)}")
+                 elif skipped_count and not error_during_multi:
+                      logging.info("Multi-monitor capture: every selected monitor was a near-duplicate; nothing queued.")
+                      return # Screenshot number is not used up
                  elif error_during_multi:
                       self.preview_label.setText("Preview Error\n(Multi-capture issues)");
                       self.preview_label.setStyleSheet("border: 1px solid red; color: red;")
@@ -1108,10 +1792,15 @@ class ScreenshotApp(QWidget):
 
             # --- Update status and increment base count ---
             # Increment base count regardless of errors in multi-mode, as the "event" happened.
-            self.status_label.setText(f"Status: Screenshot Event {current_count_base} processed.")
+            # Burst and interval frames leave that to burst_tick / finish_interval_capture once the run is done.
+            if frame is not None:
+                self.status_label.setText(f"Status: Screenshot {current_count_base} frame {frame_text} captured ({self.capture_queue.unfinished_tasks} pending).")
+                return True
+            self.status_label.setText(f"Status: Screenshot Event {current_count_base} captured ({self.capture_queue.unfinished_tasks} pending).")
             increment_value = self.increment_spin.value() if self.increment_checkbox.isChecked() else 1
             self.screenshot_count += increment_value
             logging.info(f"Incrementing screenshot count. Next base count will be: {self.screenshot_count}")
+            return True
 
 
         except IOError as e: # Catch file saving errors here specifically if they escape process_and_save
@@ -1124,45 +1813,148 @@ class ScreenshotApp(QWidget):
             # Don't increment count on critical failure? Or do? Let's increment.
 
 
-    def process_and_save_capture(self, image_pixmap, image_path, word_description, count_for_excel, desc_for_excel):
-        """Helper function to save image, add to Word, add data, and update preview."""
-        try:
-            logging.info(f"Attempting to save image to {image_path}...")
-            save_success = image_pixmap.save(image_path, "PNG")
-            if not save_success:
-                raise IOError(f"QPixmap.save() returned False for path: {image_path}")
-            logging.info(f"Successfully saved image: {image_path}")
-
-            # Add to Word document
-            self.add_to_word(image_path, word_description)
-
-            # Add to internal data lists
-            self.captured_images.append(image_path)
-            self.captured_data.append({"co": count_for_excel, "description": desc_for_excel, "image_path": image_path})
-
-            # Update the UI preview
-            self.update_preview(image_path)
-
-        except FileNotFoundError as fnf_e: # Specifically catch if image path is invalid before Word add
-             logging.error(f"Image file not found when trying to add to Word: {image_path}. Error: {fnf_e}", exc_info=True)
-             QMessageBox.warning(self, "Processing Error", f"Saved image file not found, cannot add to Word or update preview.\nPath: {image_path}")
-             # Still add data entry? Maybe mark as error?
-             self.captured_data.append({"co": count_for_excel, "description": f"[SAVE ERROR] {desc_for_excel}", "image_path": image_path})
-
-        except IOError as io_e: # Catch save errors
-            logging.error(f"IOError saving image file {image_path}: {io_e}", exc_info=True)
-            QMessageBox.critical(self, "Save Error", f"Failed to save screenshot file.\nCheck folder permissions and disk space.\nPath: {image_path}\n\nError: {io_e}")
-            # Add data entry marked with error
-            self.captured_data.append({"co": count_for_excel, "description": f"[SAVE ERROR] {desc_for_excel}", "image_path": image_path})
-
-        except Exception as e: # Catch other errors (e.g., Word processing)
-            logging.error(f"Error processing capture (Image: {os.path.basename(image_path)}): {e}", exc_info=True)
-            QMessageBox.warning(self, "Processing Error", f"An error occurred adding the screenshot to the document or updating data.\nImage: {os.path.basename(image_path)}\n\nError: {e}")
-            # Add data entry marked with error
-            self.captured_data.append({"co": count_for_excel, "description": f"[PROCESSING ERROR] {desc_for_excel}", "image_path": image_path})
-
-
-    def add_to_word(self, image_path, description, new_page=False):
+    def process_and_save_capture(self, image, image_path, word_description, count_for_excel, desc_for_excel, new_page=False, source_image=None, dedup_key="screen"):
+        """Queues a grabbed image for encoding and document insertion; returns without waiting.
+        Returns False if the image was skipped as a near-duplicate.
+        dedup_key names the screen or area, so only captures of the same one are compared."""
+        # --- Near-duplicate check, before any encoding or document work ---
+        phash = None
+        if self.dedup_mode != "off":
+            phash = perceptual_hash(image)
+            recent = self.recent_hashes.setdefault(dedup_key, deque(maxlen=DEDUP_WINDOW))
+            candidates = [(label, check) for recent_hash, label, check in recent if bin(recent_hash ^ phash).count("1") <= DEDUP_MAX_DISTANCE]
+            if candidates:
+                # Only a hash match pays for the check image on this thread; earlier captures' check images were made
+                # on the encode pool and are normally finished by now
+                check_image = duplicate_check_image(image)
+                duplicate_of = next((label for label, check in candidates
+                                     if check is not None and images_match(check.result() if isinstance(check, Future) else check, check_image)), None)
+                if duplicate_of is None and any(check is None for _, check in candidates):
+                    # Hash-only match against an earlier session cannot be confirmed, so it stays out of the evidence text
+                    logging.info(f"Capture {count_for_excel} is within hash distance of screenshot "
+                                 f"{next(label for label, check in candidates if check is None)} from an earlier session (unconfirmed)")
+            else:
+                duplicate_of = None
+                check_image = self.encode_pool.submit(duplicate_check_image, image, source_image)
+            if duplicate_of is not None:
+                if self.dedup_mode == "skip":
+                    logging.info(f"Skipped capture {count_for_excel}: near-duplicate of screenshot {duplicate_of} (hash {phash:016x})")
+                    self.status_label.setText(f"Status: Skipped near-duplicate of Screenshot {duplicate_of}.")
+                    return False
+                logging.info(f"Flagged capture {count_for_excel} as near-duplicate of screenshot {duplicate_of}")
+                word_description += f" [Near-duplicate of Screenshot {duplicate_of}]"
+                desc_for_excel += f" [Near-duplicate of {duplicate_of}]"
+            recent.append((phash, count_for_excel, check_image))
+
+        # Workers only ever see QImages (QPixmap is GUI-thread only); the preview size is read here for the same reason.
+        # source_image is the full grab a cropped view points into, passed along so it outlives the encode.
+        # No thumbnail is made or held when the session started without Excel output (rows then read "[No thumbnail]"
+        # if the box is ticked later)
+        thumb_height = round(EXCEL_THUMB_HEIGHT * (self.embed_dpi or 96) / 96) if self.excel_thumbnails else 0
+        encode_future = self.encode_pool.submit(self.encode_capture, image, image_path, self.capture_codec, self.embed_width_px,
+                                                self.preview_label.size(), source_image, thumb_height)
+        # The raw grab stays in memory until its encode finishes; count it once however many crops share it.
+        # The done callback runs while the encode job still references the grab, so its id cannot be reused meanwhile.
+        held_image = source_image if source_image is not None else image
+        grab_key = id(held_image)
+        with self.pending_grabs_lock:
+            self.pending_grabs.setdefault(grab_key, [held_image.sizeInBytes(), 0])[1] += 1
+        encode_future.add_done_callback(lambda future: self.release_pending_grab(grab_key))
+        self.capture_queue.put((encode_future, image_path, word_description, count_for_excel, desc_for_excel, new_page, phash, dedup_key))
+        logging.info(f"Queued capture {count_for_excel} for encoding: {image_path} (Pending: {self.capture_queue.unfinished_tasks})")
+        return True
+
+
+    def encode_capture(self, image, image_path, codec, embed_width_px, preview_size, source_image=None, thumb_height=0):
+        # Runs on an encode pool thread
+        logging.info(f"Attempting to save image to {image_path} ({codec['label']})...")
+        encode_start = time.perf_counter()
+        save_success = image.save(image_path, codec["format"], codec["quality"])
+        encode_ms = (time.perf_counter() - encode_start) * 1000
+        if not save_success:
+            raise IOError(f"QImage.save() returned False for path: {image_path}")
+        size_mb = os.path.getsize(image_path) / (1024 * 1024)
+        stats = f"{codec['label']}, {size_mb:.2f} MB, {encode_ms:.0f} ms"
+
+        # The document gets a display-resolution copy; the full-size original stays on disk
+        embed_source = self.build_embed_copy(image, codec, embed_width_px)
+        if embed_source is not None:
+            stats += f", embedded {len(embed_source.getbuffer()) / (1024 * 1024):.2f} MB"
+
+        # Excel index entry: full-size dimensions plus a small JPEG thumbnail, so generate_excel never reopens the file
+        index_entry = {"size": (image.width(), image.height()), "thumbnail": None}
+        if thumb_height and image.height() > 0:
+            buffer = QBuffer(); buffer.open(QIODevice.WriteOnly)
+            image.scaledToHeight(min(thumb_height, image.height()), Qt.SmoothTransformation).save(buffer, "JPG", 85)
+            index_entry["thumbnail"] = bytes(buffer.data())
+
+        # Scale the preview here too, so the GUI thread never decodes the saved file
+        return image.scaled(preview_size, Qt.KeepAspectRatio, Qt.SmoothTransformation), embed_source, stats, index_entry
+
+
+    def run_capture_writer(self):
+        # Single consumer of capture_queue: waits for each encode in hotkey order, then adds it to Word and the data lists
+        while True:
+            encode_future, image_path, word_description, count_for_excel, desc_for_excel, new_page, phash, dedup_key = self.capture_queue.get()
+            try:
+                preview_image, embed_source, stats, index_entry = encode_future.result()
+                logging.info(f"Successfully saved image: {image_path} ({stats})")
+
+                # Add to Word document
+                self.ensure_document_loaded()
+                self.add_to_word(image_path, word_description, new_page=new_page, picture_source=embed_source)
+
+                # Add to internal data lists
+                self.captured_images.append(image_path)
+                self.captured_data.append({"co": count_for_excel, "description": desc_for_excel, "image_path": image_path, "phash": phash, "dedup_key": dedup_key, **index_entry})
+                self.write_journal_record({"type": "capture", "image_path": image_path, "word_description": word_description,
+                                           "co": count_for_excel, "description": desc_for_excel, "new_page": new_page, "phash": phash, "dedup_key": dedup_key})
+
+                # Update the UI preview (delivered on the GUI thread)
+                self.capture_processed.emit(image_path, preview_image, stats)
+
+            except FileNotFoundError as fnf_e: # Specifically catch if image path is invalid before Word add
+                 logging.error(f"Image file not found when trying to add to Word: {image_path}. Error: {fnf_e}", exc_info=True)
+                 self.capture_failed.emit(False, "Processing Error", f"Saved image file not found, cannot add to Word or update preview.\nPath: {image_path}")
+                 self.captured_data.append({"co": count_for_excel, "description": f"[SAVE ERROR] {desc_for_excel}", "image_path": image_path})
+
+            except IOError as io_e: # Catch save errors
+                logging.error(f"IOError saving image file {image_path}: {io_e}", exc_info=True)
+                self.capture_failed.emit(True, "Save Error", f"Failed to save screenshot file.\nCheck folder permissions and disk space.\nPath: {image_path}\n\nError: {io_e}")
+                self.captured_data.append({"co": count_for_excel, "description": f"[SAVE ERROR] {desc_for_excel}", "image_path": image_path})
+
+            except Exception as e: # Catch other errors (e.g., Word processing)
+                logging.error(f"Error processing capture (Image: {os.path.basename(image_path)}): {e}", exc_info=True)
+                self.capture_failed.emit(False, "Processing Error", f"An error occurred adding the screenshot to the document or updating data.\nImage: {os.path.basename(image_path)}\n\nError: {e}")
+                self.captured_data.append({"co": count_for_excel, "description": f"[PROCESSING ERROR] {desc_for_excel}", "image_path": image_path})
+
+            finally:
+                self.capture_queue.task_done()
+
+
+    def wait_for_pending_captures(self):
+        pending = self.capture_queue.unfinished_tasks
+        if pending:
+            self.status_label.setText(f"Status: Finishing {pending} pending capture(s)...")
+            QApplication.processEvents()
+            logging.info(f"Waiting for {pending} queued capture(s) to be written before saving.")
+        self.capture_queue.join()
+
+
+    def on_capture_processed(self, image_path, preview_image, stats):
+        self.update_preview(image_path, preview_image)
+        if self.capture_enabled:
+            self.status_label.setText(f"Status: Saved {os.path.basename(image_path)} [{stats}] ({self.capture_queue.unfinished_tasks} pending).")
+
+
+    def show_capture_error(self, critical, title, message):
+        if critical:
+            QMessageBox.critical(self, title, message)
+        else:
+            QMessageBox.warning(self, title, message)
+
+
+    def add_to_word(self, image_path, description, new_page=False, picture_source=None):
         if not self.doc:
             logging.error("Add to Word failed: Document object (self.doc) is None.")
             return
@@ -1185,25 +1977,14 @@ class ScreenshotApp(QWidget):
             run.font.name = 'Arial'; run.font.size = Pt(10); run.italic = True
 
             # Add the image, scaled to fit page width
-            section = self.doc.sections[-1]; # Get current section
-            # Get page dimensions and margins (provide defaults if None)
-            page_w = section.page_width if section.page_width else Inches(8.5)
-            margin_l = section.left_margin if section.left_margin else Inches(1.0)
-            margin_r = section.right_margin if section.right_margin else Inches(1.0)
-
-            # Calculate available width for the image in EMUs (English Metric Units)
-            # Add a small buffer (e.g., 98%) to prevent slight overflows
-            available_width_emu = (page_w - margin_l - margin_r) * 0.98
-
-            # Convert available width to inches (1 inch = 914400 EMUs)
-            available_width_inches = available_width_emu / 914400.0
+            available_width_inches = self.picture_width_inches(self.doc)
 
             if available_width_inches <= 0:
                 # Fallback if calculation fails
                 logging.warning(f"Calculated available page width is zero or negative ({available_width_inches:.2f} inches). Adding image '{os.path.basename(image_path)}' with default size.")
                 pic_para = self.doc.add_paragraph() # Add image in its own paragraph for centering
                 pic_run = pic_para.add_run()
-                pic_run.add_picture(image_path)
+                pic_run.add_picture(picture_source or image_path)
                 pic_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
             else:
@@ -1211,7 +1992,7 @@ class ScreenshotApp(QWidget):
                 pic_para = self.doc.add_paragraph() # Add image in its own paragraph for centering
                 pic_run = pic_para.add_run()
                 # Add picture scaled to calculated width
-                pic_run.add_picture(image_path, width=Inches(available_width_inches))
+                pic_run.add_picture(picture_source or image_path, width=Inches(available_width_inches))
                 pic_para.alignment = WD_ALIGN_PARAGRAPH.CENTER # Center the paragraph containing the image
 
             # Add a blank paragraph for spacing after the image
@@ -1230,7 +2011,44 @@ class ScreenshotApp(QWidget):
             self.doc.add_paragraph(f"[Error adding content for image {os.path.basename(image_path)}: {e}]")
 
 
-    def update_preview(self, image_path):
+    def picture_width_inches(self, doc):
+        section = doc.sections[-1]; # Get current section
+        # Get page dimensions and margins (provide defaults if None)
+        page_w = section.page_width if section.page_width else Inches(8.5)
+        margin_l = section.left_margin if section.left_margin else Inches(1.0)
+        margin_r = section.right_margin if section.right_margin else Inches(1.0)
+
+        # Calculate available width for the image in EMUs (English Metric Units)
+        # Add a small buffer (e.g., 98%) to prevent slight overflows
+        available_width_emu = (page_w - margin_l - margin_r) * 0.98
+
+        # Convert available width to inches (1 inch = 914400 EMUs)
+        return available_width_emu / 914400.0
+
+
+    def build_embed_copy(self, image, codec, target_width):
+        # In-memory copy of a capture for the Word document, resampled once to the width it is displayed at.
+        # Returns None when the original file can be embedded as-is.
+        if target_width and image.width() > target_width:
+            image = image.scaledToWidth(target_width, Qt.SmoothTransformation)
+        elif codec["format"] != "WEBP":
+            return None
+        buffer = QBuffer(); buffer.open(QIODevice.WriteOnly)
+        # JPEG sessions keep JPEG; everything else embeds PNG (python-docx cannot read WebP)
+        if codec["format"] == "JPG":
+            image.save(buffer, "JPG", codec["quality"])
+        else:
+            image.save(buffer, "PNG")
+        return io.BytesIO(bytes(buffer.data()))
+
+
+    def update_preview(self, image_path, preview_image=None):
+        if preview_image is not None and not preview_image.isNull():
+            # Already scaled by the encode worker
+            self.preview_label.setPixmap(QPixmap.fromImage(preview_image))
+            self.preview_label.setStyleSheet("border: 1px solid black;")
+            logging.info(f"Preview updated successfully with image: {os.path.basename(image_path)}")
+            return
         if not image_path or not os.path.exists(image_path):
             self.preview_label.setText("Preview Error\n(File not found)");
             self.preview_label.setStyleSheet("border: 1px solid red; color: red;"); # Error style
@@ -1304,6 +2122,10 @@ class ScreenshotApp(QWidget):
             self.taskbar_hidden = False # Reset flag
 
         self.unregister_hotkey() # Attempt to unregister hotkey
+        self.stop_timed_captures()
+        self.encode_pool.shutdown(wait=False)
+        # A session closed without "End Capture & Save" stays in its journal for recovery on next launch
+        self.close_session_journal(keep=True)
         logging.shutdown() # Flush and close log file handlers
         event.accept() # Allow the window to close
 
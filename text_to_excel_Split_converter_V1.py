@@ -1,12 +1,934 @@
 import pandas as pd
+import numpy as np
 import tkinter as tk
-from tkinter import filedialog, messagebox, LabelFrame, Checkbutton, BooleanVar, Canvas, Scrollbar, ttk, Listbox, StringVar
+import tkinter.font as tkfont
+from tkinter import filedialog, messagebox, LabelFrame, Checkbutton, BooleanVar, Canvas, Scrollbar, ttk, Listbox, StringVar, Toplevel
 import os
 import webbrowser
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
 import re
+import math
 import platform
+import io
+import time
+import zipfile
+import hashlib
+import json
+import csv
+import bisect
+import datetime
+import warnings
+import sqlite3
+import tempfile
+import multiprocessing
+import threading
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_COLUMNS = 16384
+SPLIT_PLAN_SAMPLE_ROWS = 2000
+
+def format_byte_size(num_bytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+SEARCH_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".excel_tool_search_index")
+SEARCH_CACHE_BUDGET_BYTES = 1024 * 1024 * 1024
+FUZZY_MAX_CANDIDATES = 20000
+SEARCH_FIRST_CHUNK_ROWS = 500
+SEARCH_CHUNK_ROWS = 50000
+LIVE_SEARCH_DEBOUNCE_MS = 250
+EXPORT_PAGE_ROWS = 5000
+# A date comparison is refused when more than this share of a column's non-blank cells cannot be read as dates
+DATE_UNPARSED_MAX_SHARE = 0.2
+EMAIL_PATTERN = r"^[\w\.-]+@[\w\.-]+\.\w+$"
+
+def bounded_edit_distance(a, b, max_distance):
+    # Optimal string alignment distance (adjacent transpositions count as one edit).
+    # Returns None as soon as every path exceeds max_distance.
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous_previous is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return None
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+class WorkbookSearchIndex:
+    # On-disk SQLite copy of a sheet, rebuilt only when the workbook fingerprint changes
+    SCHEMA_VERSION = 1
+
+    def __init__(self, index_dir=SEARCH_INDEX_DIR):
+        self.index_dir = index_dir
+
+    def db_path(self, workbook_path, sheet_name=0):
+        key = f"{os.path.abspath(workbook_path)}::{sheet_name}"
+        return os.path.join(self.index_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".sqlite")
+
+    @staticmethod
+    def file_sha256(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def connect(db_path):
+        return sqlite3.connect(db_path)
+
+    @staticmethod
+    def read_meta(conn):
+        try:
+            return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+        except sqlite3.DatabaseError:
+            return {}
+
+    def ensure_index(self, workbook_path, sheet_name=0):
+        # Returns (db_path, headers, rebuilt). Size and mtime are checked on every call;
+        # the content hash is only recomputed when they change, so a touched-but-identical file is not re-parsed.
+        workbook_path = os.path.abspath(workbook_path)
+        stat = os.stat(workbook_path)
+        db_path = self.db_path(workbook_path, sheet_name)
+        if os.path.exists(db_path):
+            conn = self.connect(db_path)
+            try:
+                meta = self.read_meta(conn)
+                if meta.get("schema_version") == self.SCHEMA_VERSION and meta.get("path") == workbook_path:
+                    if meta.get("size") == stat.st_size and meta.get("mtime_ns") == stat.st_mtime_ns:
+                        return db_path, meta["headers"], False
+                    if meta.get("size") == stat.st_size and meta.get("sha256") == self.file_sha256(workbook_path):
+                        with conn:
+                            conn.execute("UPDATE meta SET value = ? WHERE key = 'mtime_ns'", (json.dumps(stat.st_mtime_ns),))
+                        return db_path, meta["headers"], False
+            finally:
+                conn.close()
+        headers = self.build_index(workbook_path, sheet_name, stat, db_path)
+        return db_path, headers, True
+
+    def build_index(self, workbook_path, sheet_name, stat, db_path):
+        os.makedirs(self.index_dir, exist_ok=True)
+        df = pd.read_excel(workbook_path, sheet_name=sheet_name, dtype=str)
+        headers = [str(col) for col in df.columns]
+        df.columns = [f"c{i}" for i in range(len(headers))]
+        meta = {
+            "schema_version": self.SCHEMA_VERSION,
+            "path": workbook_path,
+            "sheet_name": sheet_name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": self.file_sha256(workbook_path),
+            "headers": headers,
+            "row_count": len(df),
+        }
+        # Build into a temp file and swap it in, so an interrupted build never leaves a half-written index.
+        # Each builder gets its own temp file: folder-search processes and the Tk app's workers may index the same sheet at once.
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, prefix=os.path.basename(db_path) + ".", suffix=".tmp")
+        os.close(tmp_fd)
+        try:
+            self.write_index_file(tmp_path, df, meta)
+            os.replace(tmp_path, db_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return headers
+
+    @staticmethod
+    def write_index_file(tmp_path, df, meta):
+        conn = sqlite3.connect(tmp_path)
+        try:
+            with conn:
+                conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                conn.executemany("INSERT INTO meta VALUES (?, ?)", [(k, json.dumps(v)) for k, v in meta.items()])
+                column_defs = ", ".join(["row_id INTEGER PRIMARY KEY"] + [f"{col} TEXT" for col in df.columns])
+                conn.execute(f"CREATE TABLE cells ({column_defs})")
+                placeholders = ", ".join("?" for _ in range(len(df.columns) + 1))
+                rows = (
+                    (i, *(None if pd.isna(v) else v for v in values))
+                    for i, values in enumerate(df.itertuples(index=False, name=None))
+                )
+                conn.executemany(f"INSERT INTO cells VALUES ({placeholders})", rows)
+        finally:
+            conn.close()
+
+    def load_dataframe(self, workbook_path, sheet_name=0):
+        db_path, headers, _ = self.ensure_index(workbook_path, sheet_name)
+        conn = self.connect(db_path)
+        try:
+            df = pd.read_sql_query("SELECT * FROM cells ORDER BY row_id", conn)
+        finally:
+            conn.close()
+        df = df.drop(columns="row_id")
+        df.columns = headers
+        return df.fillna("")
+
+class ExactMatchIndex:
+    # Hash index from normalised value to the sorted row positions holding it
+    def __init__(self, normalized_series):
+        codes, uniques = pd.factorize(normalized_series)
+        self.codes = codes
+        self.values = pd.Series(uniques, dtype=object)
+        self.order = np.argsort(codes, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(uniques)))))
+        self.positions_by_value = {value: code for code, value in enumerate(uniques)}
+        self.size_bytes = self.codes.nbytes + self.order.nbytes + self.offsets.nbytes + 100 * len(self.positions_by_value)
+
+    def lookup(self, normalized_value):
+        code = self.positions_by_value.get(normalized_value)
+        if code is None:
+            return self.order[:0]
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    def rows_for_codes(self, matching_codes):
+        code_mask = np.zeros(len(self.values), dtype=bool)
+        code_mask[matching_codes] = True
+        return np.flatnonzero(code_mask[self.codes])
+
+class TrigramIndex:
+    # Inverted index from 3-character substrings to the distinct values containing them.
+    # Works on distinct values rather than rows, so repeated values are only indexed and verified once.
+    GRAM_SIZE = 3
+
+    def __init__(self, exact_index):
+        self.exact_index = exact_index
+        postings = {}
+        for code, value in enumerate(exact_index.values):
+            for gram in self.grams(value):
+                postings.setdefault(gram, []).append(code)
+        self.postings = {gram: np.array(codes, dtype=np.int64) for gram, codes in postings.items()}
+        self.lengths = exact_index.values.str.len().to_numpy(dtype=np.int64)
+        self.size_bytes = self.lengths.nbytes + sum(codes.nbytes + 100 for codes in self.postings.values())
+
+    @classmethod
+    def grams(cls, text):
+        return {text[i:i + cls.GRAM_SIZE] for i in range(len(text) - cls.GRAM_SIZE + 1)}
+
+    def candidate_codes(self, needle):
+        grams = self.grams(needle)
+        if not grams:
+            return np.arange(len(self.exact_index.values))
+        posting_lists = []
+        for gram in grams:
+            codes = self.postings.get(gram)
+            if codes is None:
+                return np.array([], dtype=np.int64)
+            posting_lists.append(codes)
+        posting_lists.sort(key=len)
+        candidates = posting_lists[0]
+        for codes in posting_lists[1:]:
+            candidates = np.intersect1d(candidates, codes, assume_unique=True)
+            if not len(candidates):
+                break
+        return candidates
+
+    def lookup(self, needle):
+        # Trigram hits only narrow the candidates; each candidate value is still checked for the full substring
+        candidates = self.candidate_codes(needle)
+        candidate_values = self.exact_index.values.iloc[candidates]
+        matching_codes = candidates[candidate_values.str.contains(needle, regex=False).to_numpy(dtype=bool)]
+        return self.exact_index.rows_for_codes(matching_codes)
+
+    def fuzzy_candidates(self, needle, max_edits, max_candidates=FUZZY_MAX_CANDIDATES):
+        # q-gram filter: a value within k edits of the needle shares at least len(grams) - 4k trigrams with it
+        # (a substitution touches 3 trigrams, an adjacent transposition 4). When that bound is not positive the
+        # filter proves nothing and every value of a plausible length is a candidate. Only the best max_candidates
+        # values are kept, which keeps the verification cost bounded for very short needles. Returns value codes.
+        grams = self.grams(needle)
+        posting_lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        shared_counts = np.bincount(np.concatenate(posting_lists), minlength=len(self.exact_index.values)) if posting_lists \
+            else np.zeros(len(self.exact_index.values), dtype=np.int64)
+        min_shared = len(grams) - (self.GRAM_SIZE + 1) * max_edits
+        candidates = np.flatnonzero((shared_counts >= min_shared) & (np.abs(self.lengths - len(needle)) <= max_edits))
+        if len(candidates) > max_candidates:
+            candidates = candidates[np.argsort(-shared_counts[candidates], kind="stable")[:max_candidates]]
+        return candidates
+
+class CachedSheet:
+    # Parsed sheet plus lazily built case-folded copies of the columns that have been searched
+    def __init__(self, key, df):
+        self.key = key
+        self.df = df
+        self.headers = list(df.columns)
+        self.lock = threading.RLock()
+        self.normalized = {}
+        self.exact_indexes = {}
+        self.trigram_indexes = {}
+        self.numeric_columns = {}
+        self.datetime_columns = {}
+        self.size_bytes = int(df.memory_usage(index=True, deep=True).sum())
+
+    def normalized_column(self, column):
+        with self.lock:
+            series = self.normalized.get(column)
+            if series is None:
+                series = self.df[column].astype(str).str.casefold()
+                self.normalized[column] = series
+                self.size_bytes += int(series.memory_usage(index=False, deep=True))
+            return series
+
+    def exact_index(self, column):
+        with self.lock:
+            index = self.exact_indexes.get(column)
+            if index is None:
+                index = ExactMatchIndex(self.normalized_column(column))
+                self.exact_indexes[column] = index
+                self.size_bytes += index.size_bytes
+            return index
+
+    def numeric_column(self, column):
+        with self.lock:
+            series = self.numeric_columns.get(column)
+            if series is None:
+                series = pd.to_numeric(self.df[column].replace("", np.nan), errors="coerce")
+                self.numeric_columns[column] = series
+                self.size_bytes += int(series.memory_usage(index=False))
+            return series
+
+    def datetime_column(self, column):
+        with self.lock:
+            series = self.datetime_columns.get(column)
+            if series is None:
+                # format="mixed" parses each cell on its own; otherwise pandas infers one format from the first value
+                # and every cell written differently (e.g. "2024-01-05" next to "05/01/2024") becomes NaT
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    series = pd.to_datetime(self.df[column].replace("", np.nan), errors="coerce", format="mixed")
+                self.datetime_columns[column] = series
+                self.size_bytes += int(series.memory_usage(index=False))
+            return series
+
+    def rows_to_mask(self, positions):
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def trigram_index(self, column):
+        with self.lock:
+            index = self.trigram_indexes.get(column)
+            if index is None:
+                index = TrigramIndex(self.exact_index(column))
+                self.trigram_indexes[column] = index
+                self.size_bytes += index.size_bytes
+            return index
+
+class MissingColumnError(ValueError):
+    # A query names a column the sheet does not have; folder search treats that sheet as having no matches
+    pass
+
+class SearchQuery:
+    # Small query language for Stage 3, e.g.
+    #   Region = North AND ([Status] contains open OR Amount between 100 and 500) AND NOT Date < 2024-01-01
+    # Column names with spaces go in [brackets]; values with spaces go in quotes.
+    # Numbers and dates compare as numbers and dates, anything else compares case-insensitively as text.
+    COMPARISON_OPS = {"=", "!=", "<>", ">", ">=", "<", "<="}
+    TOKEN_RE = re.compile(r"""\s*(?:(\[[^\]]+\])|("[^"]*"|'[^']*')|(>=|<=|!=|<>|=|>|<|\(|\))|([^\s()=<>!\[\]"']+))""")
+    DATE_RE = re.compile(r"^(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{4})([ T]\d{1,2}:\d{2}(:\d{2})?)?$")
+
+    def __init__(self, text, headers):
+        self.headers_by_name = {str(h).casefold(): h for h in headers}
+        self.tokens = self.tokenize(text)
+        self.pos = 0
+        if not self.tokens:
+            raise ValueError("The query is empty.")
+        self.tree = self.parse_or()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.pos][1]}' in query.")
+
+    @classmethod
+    def tokenize(cls, text):
+        tokens = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = cls.TOKEN_RE.match(text, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"Could not read the query near '{text[pos:pos + 20]}'.")
+            column, quoted, op, word = match.groups()
+            if column:
+                tokens.append(("column", column[1:-1]))
+            elif quoted:
+                tokens.append(("string", quoted[1:-1]))
+            elif op:
+                tokens.append(("op", op))
+            else:
+                tokens.append(("word", word))
+            pos = match.end()
+        return tokens
+
+    def peek_keyword(self, keyword):
+        return self.pos < len(self.tokens) and self.tokens[self.pos][0] == "word" and self.tokens[self.pos][1].lower() == keyword
+
+    def next_token(self, expected):
+        if self.pos >= len(self.tokens):
+            raise ValueError(f"The query ended early; expected {expected}.")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek_keyword("or"):
+            self.pos += 1
+            node = ("or", node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek_keyword("and"):
+            self.pos += 1
+            node = ("and", node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.peek_keyword("not"):
+            self.pos += 1
+            return ("not", self.parse_not())
+        if self.pos < len(self.tokens) and self.tokens[self.pos] == ("op", "("):
+            self.pos += 1
+            node = self.parse_or()
+            if self.next_token("')'") != ("op", ")"):
+                raise ValueError("Missing ')' in query.")
+            return node
+        return self.parse_condition()
+
+    def parse_condition(self):
+        kind, name = self.next_token("a column name")
+        if kind == "op":
+            raise ValueError(f"Expected a column name but found '{name}'.")
+        column = self.headers_by_name.get(name.casefold())
+        if column is None:
+            raise MissingColumnError(f"Column '{name}' not found in the Excel file.")
+        kind, op = self.next_token("an operator")
+        op = op.lower()
+        if kind == "op" and op in self.COMPARISON_OPS:
+            return ("cond", column, "!=" if op == "<>" else op, [self.parse_value()])
+        if kind == "word" and op == "contains":
+            return ("cond", column, "contains", [self.parse_value()])
+        if kind == "word" and op == "between":
+            low = self.parse_value()
+            if not self.peek_keyword("and"):
+                raise ValueError("Use 'between <low> and <high>'.")
+            self.pos += 1
+            return ("cond", column, "between", [low, self.parse_value()])
+        raise ValueError(f"Unknown operator '{op}' after column '{column}'.")
+
+    def parse_value(self):
+        kind, value = self.next_token("a value")
+        if kind not in ("string", "word"):
+            raise ValueError(f"Expected a value but found '{value}'.")
+        return value
+
+    @classmethod
+    def typed_value(cls, value):
+        # "nan", "inf" and "infinity" parse as floats but would never compare equal or in range; treat them as text
+        try:
+            number = float(value.replace(",", ""))
+            if math.isfinite(number):
+                return "number", number
+        except ValueError:
+            pass
+        if cls.DATE_RE.match(value.strip()):
+            return "date", pd.to_datetime(value.strip(), format="mixed")
+        return "text", value.casefold()
+
+    def evaluate(self, sheet):
+        return self.evaluate_node(self.tree, sheet)
+
+    def evaluate_node(self, node, sheet):
+        if node[0] == "and":
+            return self.evaluate_node(node[1], sheet) & self.evaluate_node(node[2], sheet)
+        if node[0] == "or":
+            return self.evaluate_node(node[1], sheet) | self.evaluate_node(node[2], sheet)
+        if node[0] == "not":
+            return ~self.evaluate_node(node[1], sheet)
+        _, column, op, values = node
+        if op == "contains":
+            return sheet.rows_to_mask(sheet.trigram_index(column).lookup(values[0].casefold()))
+        typed = [self.typed_value(v) for v in values]
+        kind = typed[0][0]
+        if any(t[0] != kind for t in typed):
+            raise ValueError(f"Both ends of the range on '{column}' must be the same kind of value.")
+        if kind == "text" and op in ("=", "!="):
+            mask = sheet.rows_to_mask(sheet.exact_index(column).lookup(typed[0][1]))
+            return ~mask if op == "!=" else mask
+        if kind == "number":
+            series = sheet.numeric_column(column)
+        elif kind == "date":
+            series = sheet.datetime_column(column)
+            non_blank = sheet.normalized_column(column) != ""
+            unparsed = int((series.isna() & non_blank).sum())
+            if unparsed and unparsed > DATE_UNPARSED_MAX_SHARE * int(non_blank.sum()):
+                raise ValueError(f"{unparsed:,} of {int(non_blank.sum()):,} values in '{column}' could not be read as dates, "
+                                 f"so a date comparison would silently skip them.")
+        else:
+            series = sheet.normalized_column(column)
+        low = typed[0][1]
+        if op == "between":
+            result = (series >= low) & (series <= typed[1][1])
+        elif op == "=":
+            result = series == low
+        elif op == "!=":
+            result = ~(series == low)
+        elif op == ">":
+            result = series > low
+        elif op == ">=":
+            result = series >= low
+        elif op == "<":
+            result = series < low
+        else:
+            result = series <= low
+        return result.to_numpy(dtype=bool)
+
+class ParsedWorkbookCache:
+    # LRU of parsed sheets keyed by (path, sheet, size, mtime), bounded by an approximate memory budget
+    def __init__(self, search_index, budget_bytes=SEARCH_CACHE_BUDGET_BYTES):
+        self.search_index = search_index
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Searches run on worker threads; one lock keeps the LRU bookkeeping consistent and stops two
+        # threads parsing the same workbook at once
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def fingerprint(workbook_path, sheet_name=0):
+        stat = os.stat(workbook_path)
+        return (os.path.abspath(workbook_path), sheet_name, stat.st_size, stat.st_mtime_ns)
+
+    def get(self, workbook_path, sheet_name=0):
+        with self.lock:
+            return self.get_locked(workbook_path, sheet_name)
+
+    def get_locked(self, workbook_path, sheet_name):
+        key = self.fingerprint(workbook_path, sheet_name)
+        sheet = self.entries.get(key)
+        if sheet is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.trim()
+            return sheet
+        self.misses += 1
+        for stale_key in [k for k in self.entries if k[:2] == key[:2]]:
+            del self.entries[stale_key]
+        sheet = CachedSheet(key, self.search_index.load_dataframe(workbook_path, sheet_name))
+        self.entries[key] = sheet
+        self.trim()
+        return sheet
+
+    def peek(self, workbook_path, sheet_name=0):
+        # Cached sheet for the file as it is on disk now, or None; never loads anything.
+        # Called from the Tk thread, so it also returns None rather than wait while a worker holds the lock.
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            return self.entries.get(self.fingerprint(workbook_path, sheet_name))
+        except OSError:
+            return None
+        finally:
+            self.lock.release()
+
+    def used_bytes(self):
+        # Works on a snapshot so the Tk thread can report stats while a worker inserts or evicts,
+        # without waiting on the lock for a whole workbook load
+        return sum(sheet.size_bytes for sheet in list(self.entries.values()))
+
+    def trim(self):
+        # The most recently used sheet is always kept, even if it alone exceeds the budget
+        while len(self.entries) > 1 and self.used_bytes() > self.budget_bytes:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats_text(self):
+        sheets = list(self.entries.values())
+        used = sum(sheet.size_bytes for sheet in sheets)
+        return (f"Cache: {self.hits} hit(s), {self.misses} miss(es), {self.evictions} eviction(s), "
+                f"{len(sheets)} sheet(s), {format_byte_size(used)} of {format_byte_size(self.budget_bytes)}")
+
+def iter_search_chunks(sheet, selected_column, search_value, search_type, max_edits=2, chunk_rows=SEARCH_CHUNK_ROWS):
+    # Yields the matches of one Stage 3 search as frames in sheet order, so a caller can show rows as they are found
+    # and stop between chunks. Index lookups (exact, contains, query) find every position at once and are yielded
+    # chunk_rows at a time. Regex and fuzzy scan the sheet chunk_rows rows at a time, testing each distinct value the
+    # first time it appears; a chunk with no matches is yielded empty. Fuzzy chunks carry a "Similarity %" column.
+    # Raises ValueError for a bad query and re.error for a bad regex.
+    needle = search_value.casefold()
+    if search_type in ("regex", "fuzzy"):
+        exact_index = sheet.exact_index(selected_column)
+        # Per distinct value: -1 not tested yet, -2 no match, otherwise its similarity % (0 for a regex match)
+        scores = np.full(len(exact_index.values), -1, dtype=np.int64)
+        if search_type == "regex":
+            pattern = re.compile(search_value, re.IGNORECASE)
+            def score(codes):
+                matches = exact_index.values.iloc[codes].str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool)
+                return np.where(matches, 0, -2)
+        else:
+            scores[:] = -2
+            scores[sheet.trigram_index(selected_column).fuzzy_candidates(needle, max_edits)] = -1
+            def score(codes):
+                similarities = []
+                for code in codes:
+                    value = exact_index.values.iat[code]
+                    distance = bounded_edit_distance(needle, value, max_edits)
+                    similarities.append(-2 if distance is None else round(100 * (1 - distance / max(len(needle), len(value), 1))))
+                return similarities
+        for start in range(0, len(exact_index.codes), chunk_rows):
+            codes = exact_index.codes[start:start + chunk_rows]
+            untested = np.unique(codes[scores[codes] == -1])
+            if len(untested):
+                scores[untested] = score(untested)
+            hits = np.flatnonzero(scores[codes] >= 0)
+            chunk = sheet.df.iloc[start + hits]
+            if search_type == "fuzzy":
+                chunk = chunk.copy()
+                chunk.insert(0, "Similarity %", scores[codes[hits]])
+            yield chunk
+        return
+    if search_type == "query":
+        positions = np.flatnonzero(SearchQuery(search_value, sheet.headers).evaluate(sheet))
+    elif search_type == "exact":
+        # Built on first exact search of a column, then every lookup is a dict hit
+        positions = sheet.exact_index(selected_column).lookup(needle)
+    else:
+        positions = sheet.trigram_index(selected_column).lookup(needle)
+    for start in range(0, len(positions), chunk_rows):
+        yield sheet.df.iloc[positions[start:start + chunk_rows]]
+
+def rank_fuzzy_results(results_df):
+    # Closest matches first; rows of equal similarity stay in sheet order
+    return results_df.sort_values("Similarity %", ascending=False, kind="stable")
+
+def search_cached_sheet(sheet, selected_column, search_value, search_type, max_edits=2):
+    # Runs one Stage 3 search against a cached sheet and returns all matching rows at once.
+    # Raises ValueError for a bad query and re.error for a bad regex.
+    chunks = [chunk for chunk in iter_search_chunks(sheet, selected_column, search_value, search_type, max_edits) if not chunk.empty]
+    if not chunks:
+        return sheet.df.iloc[0:0]
+    results_df = pd.concat(chunks)
+    return rank_fuzzy_results(results_df) if search_type == "fuzzy" else results_df
+
+def search_workbook_sheets(workbook_path, index_dir, column_name, search_value, search_type, max_edits):
+    # Process-pool worker for folder search: index, load and search every sheet of one workbook, returning
+    # ([(sheet_name, column, matching_rows_df)], [error text]). Sheets are loaded straight from the on-disk index
+    # rather than through the app's LRU, so a folder scan neither blocks on nor evicts the workbook the user has open.
+    wb = load_workbook(workbook_path, read_only=True)
+    try:
+        sheet_names = wb.sheetnames
+    finally:
+        wb.close()
+    search_index = WorkbookSearchIndex(index_dir)
+    matches = []
+    errors = []
+    for sheet_name in sheet_names:
+        try:
+            sheet = CachedSheet((workbook_path, sheet_name), search_index.load_dataframe(workbook_path, sheet_name))
+            column = None
+            if column_name is not None:
+                column = next((h for h in sheet.headers if str(h).casefold() == column_name.casefold()), None)
+                if column is None:
+                    continue
+            results_df = search_cached_sheet(sheet, column, search_value, search_type, max_edits)
+        except MissingColumnError:
+            # A query naming columns this sheet does not have simply has no matches here
+            continue
+        except Exception as e:
+            errors.append(f"{os.path.basename(workbook_path)} [{sheet_name}]: {e}")
+            continue
+        if not results_df.empty:
+            matches.append((sheet_name, column, results_df))
+    return matches, errors
+
+class ResultsGrid(tk.Frame):
+    # Canvas-drawn results table that only draws the rows currently in view, so a
+    # 20k x 30 result costs the same to show and scroll as a 20 row one.
+    ROW_HEIGHT = 22
+    HEADER_BG = "#B7D6F6"
+    HIGHLIGHT_BG = "#FFD966"
+    MIN_COLUMN_WIDTH = 80
+    MAX_COLUMN_WIDTH = 320
+
+    def __init__(self, parent, on_email_click, email_pattern=EMAIL_PATTERN, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.on_email_click = on_email_click
+        self.email_pattern = email_pattern
+        self.body_font = tkfont.Font(family="Arial", size=10)
+        self.link_font = tkfont.Font(family="Arial", size=10, underline=True)
+        self.header_font = tkfont.Font(family="Arial", size=10, weight="bold")
+        self.char_width = max(self.body_font.measure("0"), 1)
+        self.canvas = Canvas(self, bg="white", highlightthickness=0, height=260)
+        self.vscroll = Scrollbar(self, orient="vertical", command=self.on_vertical_scroll)
+        self.hscroll = Scrollbar(self, orient="horizontal", command=self.canvas.xview)
+        self.canvas.configure(xscrollcommand=self.hscroll.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.vscroll.grid(row=0, column=1, sticky="ns")
+        self.hscroll.grid(row=1, column=0, sticky="ew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Motion>", self.on_motion)
+        self.canvas.bind("<MouseWheel>", lambda event: self.scroll_rows(-3 if event.delta > 0 else 3))
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_rows(3))
+        self.clear()
+
+    def clear(self):
+        # Appended result sets are kept as separate blocks until finish_data, so each append only touches the new rows
+        self.blocks = []
+        self.block_starts = []
+        self.block_highlights = []
+        self.block_links = []
+        self.row_count = 0
+        self.columns = []
+        self.order = np.arange(0)
+        self.column_offsets = [0]
+        self.company_col = None
+        self.sort_column = None
+        self.sort_descending = False
+        self.top_row = 0
+        self.message = None
+        self.redraw()
+
+    def show_message(self, text):
+        self.clear()
+        self.message = text
+        self.redraw()
+
+    def set_data(self, df, highlight_col=None, highlight_mask=None):
+        self.clear()
+        self.append_data(df, highlight_col, highlight_mask)
+
+    def append_data(self, df, highlight_col=None, highlight_mask=None):
+        # Appended blocks may bring new columns (e.g. folder search over different sheets); columns are unioned by name.
+        # Rows added while a sort is active go below the sorted rows until finish_data re-sorts once.
+        df = df.reset_index(drop=True)
+        df.columns = [str(col) for col in df.columns]
+        self.message = None
+        new_columns = [col for col in df.columns if col not in self.columns]
+        self.columns = self.columns + new_columns
+        highlight_cols = np.full(len(df), -1)
+        if highlight_col is not None and highlight_mask is not None and str(highlight_col) in self.columns:
+            highlight_cols[np.asarray(highlight_mask, dtype=bool)] = self.columns.index(str(highlight_col))
+        self.blocks.append(df)
+        self.block_starts.append(self.row_count)
+        self.block_highlights.append(highlight_cols)
+        self.block_links.append(self.detect_links(df))
+        self.row_count += len(df)
+        self.company_col = next((i for i, col in enumerate(self.columns) if col.lower() == "company"), None)
+        self.measure_columns(new_columns)
+        self.redraw()
+
+    def finish_data(self):
+        # Called once the last block has arrived: joins the blocks into one frame and re-sorts if a sort is active
+        if len(self.blocks) > 1:
+            sizes = [len(block) for block in self.blocks]
+            link_columns = set().union(*self.block_links)
+            self.block_links = [{
+                col: np.concatenate([links.get(col, np.zeros(size, dtype=bool)) for links, size in zip(self.block_links, sizes)])
+                for col in link_columns
+            }]
+            self.blocks = [pd.concat(self.blocks, ignore_index=True).reindex(columns=self.columns).fillna("")]
+            self.block_starts = [0]
+            self.block_highlights = [np.concatenate(self.block_highlights)]
+        if self.sort_column is not None:
+            self.apply_sort()
+        self.redraw()
+
+    def set_sort(self, column, descending=False):
+        # Sort applied by the next finish_data, e.g. fuzzy results ranked once every chunk has arrived
+        if column in self.columns:
+            self.sort_column = self.columns.index(column)
+            self.sort_descending = descending
+
+    def locate(self, row):
+        # (block, row within block) for a row number across all blocks
+        block = bisect.bisect_right(self.block_starts, row) - 1
+        return block, row - self.block_starts[block]
+
+    def display_rows(self, start, stop):
+        # Source row numbers shown at display positions start..stop; rows past the sorted ones keep arrival order
+        stop = min(stop, self.row_count)
+        sorted_rows = self.order[start:stop]
+        return np.concatenate([sorted_rows, np.arange(max(start, len(self.order)), stop)]) if len(sorted_rows) < stop - start else sorted_rows
+
+    def page_values(self, rows):
+        # Pulls just the given rows out of their blocks, in the union column order (missing columns read as blank)
+        values = np.empty((len(rows), len(self.columns)), dtype=object)
+        if not len(rows):
+            return values
+        block_ids = np.searchsorted(self.block_starts, rows, side="right") - 1
+        for block in np.unique(block_ids):
+            selected = np.flatnonzero(block_ids == block)
+            local_rows = np.asarray(rows)[selected] - self.block_starts[block]
+            values[selected] = self.blocks[block].iloc[local_rows].reindex(columns=self.columns).to_numpy(dtype=object)
+        return values
+
+    def detect_links(self, df):
+        # Email cells are found once per column when results arrive; drawing and clicks just index the cached masks
+        links = {}
+        for col in df.columns:
+            values = df[col]
+            if values.dtype != object and not pd.api.types.is_string_dtype(values):
+                continue
+            mask = values.astype(str).str.match(self.email_pattern, na=False).to_numpy(dtype=bool)
+            if mask.any():
+                links[col] = mask
+        return links
+
+    def is_link(self, row, col):
+        block, local_row = self.locate(row)
+        mask = self.block_links[block].get(self.columns[col])
+        return mask is not None and bool(mask[local_row])
+
+    def cell_value(self, row, col):
+        block, local_row = self.locate(row)
+        column = self.columns[col]
+        return self.blocks[block][column].iat[local_row] if column in self.blocks[block].columns else ""
+
+    def measure_columns(self, new_columns):
+        # Existing columns keep their width; a new column is sized from the first rows of the block that brought it
+        sample = self.blocks[-1].iloc[:100]
+        offsets = self.column_offsets
+        for col in new_columns:
+            width = self.header_font.measure(col + " v") + 12
+            for value in sample[col].to_numpy(dtype=object):
+                width = max(width, self.body_font.measure(self.cell_text(value)) + 12)
+            offsets.append(offsets[-1] + min(max(width, self.MIN_COLUMN_WIDTH), self.MAX_COLUMN_WIDTH))
+        self.canvas.configure(scrollregion=(0, 0, offsets[-1], 0))
+
+    @staticmethod
+    def cell_text(value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return ""
+        return str(value)
+
+    def visible_row_count(self):
+        return max(1, (self.canvas.winfo_height() - self.ROW_HEIGHT) // self.ROW_HEIGHT)
+
+    def redraw(self):
+        self.canvas.delete("all")
+        if self.message is not None:
+            self.canvas.create_text(5, 5, anchor="nw", text=self.message, font=self.body_font)
+        if not self.blocks:
+            self.vscroll.set(0, 1)
+            return
+        total = self.row_count
+        visible = self.visible_row_count()
+        self.top_row = max(0, min(self.top_row, total - visible))
+        for j, col in enumerate(self.columns):
+            x0, x1 = self.column_offsets[j], self.column_offsets[j + 1]
+            label = col
+            if j == self.sort_column:
+                label += " v" if self.sort_descending else " ^"
+            self.canvas.create_rectangle(x0, 0, x1, self.ROW_HEIGHT, fill=self.HEADER_BG, outline="black")
+            self.canvas.create_text(x0 + 5, self.ROW_HEIGHT // 2, anchor="w", text=label, font=self.header_font)
+        # Only the rows on screen are pulled out of the blocks; the rest of the result set is never copied
+        page_rows = self.display_rows(self.top_row, self.top_row + visible)
+        page = self.page_values(page_rows)
+        for offset, source_row in enumerate(page_rows):
+            y0 = self.ROW_HEIGHT * (1 + offset)
+            block, local_row = self.locate(source_row)
+            highlight_col = self.block_highlights[block][local_row]
+            links = self.block_links[block]
+            for j, col in enumerate(self.columns):
+                x0, x1 = self.column_offsets[j], self.column_offsets[j + 1]
+                text = self.cell_text(page[offset, j])
+                bg = self.HIGHLIGHT_BG if highlight_col == j else "white"
+                is_link = col in links and links[col][local_row]
+                max_chars = (x1 - x0 - 10) // self.char_width
+                if len(text) > max_chars:
+                    text = text[:max(max_chars - 3, 0)] + "..."
+                self.canvas.create_rectangle(x0, y0, x1, y0 + self.ROW_HEIGHT, fill=bg, outline="#999999")
+                self.canvas.create_text(
+                    x0 + 5, y0 + self.ROW_HEIGHT // 2, anchor="w", text=text,
+                    fill="blue" if is_link else "black", font=self.link_font if is_link else self.body_font
+                )
+        if total:
+            self.vscroll.set(self.top_row / total, min(1.0, (self.top_row + visible) / total))
+        else:
+            self.vscroll.set(0, 1)
+
+    def scroll_rows(self, count):
+        self.top_row += count
+        self.redraw()
+        return "break"
+
+    def on_vertical_scroll(self, *args):
+        total = self.row_count
+        if args[0] == "moveto":
+            self.top_row = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = self.visible_row_count() if args[2] == "pages" else 1
+            self.top_row += int(args[1]) * step
+        self.redraw()
+
+    def cell_at(self, event):
+        if not self.blocks:
+            return None, None
+        x = self.canvas.canvasx(event.x)
+        col = bisect.bisect_right(self.column_offsets, x) - 1
+        if col < 0 or col >= len(self.columns):
+            return None, None
+        if event.y < self.ROW_HEIGHT:
+            return -1, col
+        row = self.top_row + (event.y - self.ROW_HEIGHT) // self.ROW_HEIGHT
+        if row >= self.row_count:
+            return None, None
+        return int(self.display_rows(row, row + 1)[0]), col
+
+    def on_click(self, event):
+        row, col = self.cell_at(event)
+        if row is None:
+            return
+        if row == -1:
+            self.sort_descending = not self.sort_descending if self.sort_column == col else False
+            self.sort_column = col
+            self.apply_sort()
+            self.top_row = 0
+            self.redraw()
+            return
+        if self.is_link(row, col):
+            text = self.cell_text(self.cell_value(row, col))
+            company = self.cell_text(self.cell_value(row, self.company_col)) if self.company_col is not None else ""
+            self.on_email_click(text, company)
+
+    def on_motion(self, event):
+        row, col = self.cell_at(event)
+        is_link = row is not None and row >= 0 and self.is_link(row, col)
+        self.canvas.config(cursor="hand2" if is_link or row == -1 else "")
+
+    def apply_sort(self):
+        # Sorts the already-fetched rows in place of re-running the search; numeric columns sort numerically
+        column = self.columns[self.sort_column]
+        column_values = pd.concat(
+            [block[column] if column in block.columns else pd.Series([""] * len(block), dtype=object) for block in self.blocks],
+            ignore_index=True
+        ).fillna("")
+        numeric = pd.to_numeric(column_values.replace("", np.nan), errors="coerce")
+        if len(numeric) and numeric.notna().sum() >= (column_values != "").sum():
+            keys = numeric.fillna(-np.inf).to_numpy()
+        else:
+            keys = column_values.astype(str).str.casefold().to_numpy()
+        if self.sort_descending:
+            # Reversing a stable sort of the reversed keys keeps equal rows in their original order
+            self.order = (len(keys) - 1 - np.argsort(keys[::-1], kind="stable"))[::-1]
+        else:
+            self.order = np.argsort(keys, kind="stable")
 
 class ExcelToolApp:
     def __init__(self, root):
@@ -144,11 +1066,21 @@ class ExcelToolApp:
         self.cancel_group_button.grid(row=0, column=1, padx=5)
         self.group_definition_frame.columnconfigure(1, weight=1)
         self.group_definition_frame.rowconfigure(1, weight=1)
+        split_action_frame = tk.Frame(self.frame_stage2)
+        split_action_frame.grid(row=4, column=0, columnspan=3, pady=13)
+        self.plan_split_button = tk.Button(
+            split_action_frame, text="Plan Split (Dry Run)", width=20,
+            bg="#6C757D", fg="white", command=self.plan_column_group_split
+        )
+        self.plan_split_button.grid(row=0, column=0, padx=5)
         self.perform_split_button = tk.Button(
-            self.frame_stage2, text="Perform Split", width=48,
+            split_action_frame, text="Perform Split", width=48,
             bg="#28A745", fg="white", state=tk.DISABLED, command=self.perform_column_group_split
         )
-        self.perform_split_button.grid(row=4, column=0, columnspan=3, pady=13)
+        self.perform_split_button.grid(row=0, column=1, padx=5)
+        self.split_zip_bundle_var = BooleanVar(value=False)
+        self.split_zip_bundle_check = Checkbutton(split_action_frame, text="Bundle outputs into a single .zip (with manifest)", variable=self.split_zip_bundle_var)
+        self.split_zip_bundle_check.grid(row=1, column=0, columnspan=2, pady=(5, 0))
         self.dataiq_button_stage2 = tk.Button(
             self.frame_stage2, text="DataIQ", width=16,
             bg="#4285F4", fg="white", command=self.open_dataiq_url
@@ -179,40 +1111,68 @@ class ExcelToolApp:
         self.search_value_entry.grid(row=3, column=1, sticky="ew", pady=3)
         tk.Label(self.frame_stage3, text="Search Type:").grid(row=4, column=0, sticky="e", pady=3)
         self.search_type_var = StringVar(value="contains")
-        self.search_contains_radio = tk.Radiobutton(self.frame_stage3, text="Contains", variable=self.search_type_var, value="contains")
-        self.search_exact_radio = tk.Radiobutton(self.frame_stage3, text="Exact Match", variable=self.search_type_var, value="exact")
-        self.search_contains_radio.grid(row=4, column=1, sticky="w")
-        self.search_exact_radio.grid(row=4, column=1, sticky="e")
+        search_type_frame = tk.Frame(self.frame_stage3)
+        search_type_frame.grid(row=4, column=1, sticky="ew")
+        self.search_contains_radio = tk.Radiobutton(search_type_frame, text="Contains", variable=self.search_type_var, value="contains", command=self.on_search_type_change)
+        self.search_exact_radio = tk.Radiobutton(search_type_frame, text="Exact Match", variable=self.search_type_var, value="exact", command=self.on_search_type_change)
+        self.search_query_radio = tk.Radiobutton(search_type_frame, text="Query", variable=self.search_type_var, value="query", command=self.on_search_type_change)
+        self.search_regex_radio = tk.Radiobutton(search_type_frame, text="Regex", variable=self.search_type_var, value="regex", command=self.on_search_type_change)
+        self.search_fuzzy_radio = tk.Radiobutton(search_type_frame, text="Fuzzy", variable=self.search_type_var, value="fuzzy", command=self.on_search_type_change)
+        self.search_contains_radio.pack(side="left")
+        self.search_exact_radio.pack(side="left")
+        self.search_query_radio.pack(side="left")
+        self.search_regex_radio.pack(side="left")
+        self.search_fuzzy_radio.pack(side="left")
+        tk.Label(search_type_frame, text="Max edits:").pack(side="left", padx=(8, 0))
+        self.fuzzy_max_edits_spinbox = tk.Spinbox(search_type_frame, from_=1, to=5, width=3)
+        self.fuzzy_max_edits_spinbox.delete(0, tk.END)
+        self.fuzzy_max_edits_spinbox.insert(0, "2")
+        self.fuzzy_max_edits_spinbox.pack(side="left")
+        self.live_search_var = BooleanVar(value=False)
+        self.live_search_check = Checkbutton(search_type_frame, text="Search as you type", variable=self.live_search_var)
+        self.live_search_check.pack(side="left", padx=(8, 0))
+        self.search_value_entry.bind("<KeyRelease>", self.on_search_value_key)
         self.search_button = tk.Button(
             self.frame_stage3, text="Search", width=20,
             bg="#17A2B8", fg="white", state="disabled", command=self.perform_search
         )
-        self.search_button.grid(row=3, column=2, padx=3, pady=3, rowspan=2, sticky="n")
+        self.search_button.grid(row=3, column=2, padx=3, pady=3)
+        self.cancel_search_button = tk.Button(self.frame_stage3, text="Cancel Search", width=20, state="disabled", command=self.cancel_search)
+        self.cancel_search_button.grid(row=4, column=2, padx=3, pady=3)
+        self.bulk_search_button = tk.Button(self.frame_stage3, text="Bulk Search...", state="disabled", command=self.open_bulk_search_dialog)
+        self.bulk_search_button.grid(row=2, column=2, padx=3, pady=3)
+        self.search_folder_button = tk.Button(self.frame_stage3, text="Search Folder...", state="disabled", command=self.start_folder_search)
+        self.search_folder_button.grid(row=1, column=1, sticky="e", pady=3)
         tk.Label(self.frame_stage3, text="Search Results:").grid(row=5, column=0, sticky="nw", pady=3)
-        self.results_table_frame = tk.Frame(self.frame_stage3, bd=2, relief="solid")
-        self.results_table_frame.grid(row=5, column=1, columnspan=2, sticky="nsew", pady=3)
-        self.results_canvas = Canvas(self.results_table_frame, bg="white", highlightthickness=0)
-        self.results_canvas.pack(side="left", fill="both", expand=True)
-        self.results_scrollbar_y = Scrollbar(self.results_table_frame, orient="vertical", command=self.results_canvas.yview)
-        self.results_scrollbar_y.pack(side="right", fill="y")
-        self.results_canvas.configure(yscrollcommand=self.results_scrollbar_y.set)
-        self.results_scrollbar_x = Scrollbar(self.frame_stage3, orient="horizontal", command=self.results_canvas.xview)
-        self.results_scrollbar_x.grid(row=6, column=1, columnspan=2, sticky="ew")
-        self.results_canvas.configure(xscrollcommand=self.results_scrollbar_x.set)
-        self.results_inner_frame = tk.Frame(self.results_canvas, bg="white")
-        self.results_canvas.create_window((0, 0), window=self.results_inner_frame, anchor="nw")
-        self.results_inner_frame.bind("<Configure>", lambda event: self.results_canvas.configure(scrollregion=self.results_canvas.bbox("all")))
+        self.results_grid = ResultsGrid(self.frame_stage3, on_email_click=self.open_outlook_mail, bd=2, relief="solid")
+        self.results_grid.grid(row=5, column=1, columnspan=2, rowspan=2, sticky="nsew", pady=3)
         self.export_results_button = tk.Button(
             self.frame_stage3, text="Export Results", width=16, bg="#4361ee", fg="white",
             state="disabled", command=self.export_search_results_with_color
         )
         self.export_results_button.grid(row=7, column=1, sticky="e", pady=(3, 7))
+        self.search_index_status_label = tk.Label(self.frame_stage3, text="", anchor="w", fg="#555555")
+        # Own row below Export Results, spanning the frame so long status lines are not clipped or covered
+        self.search_index_status_label.grid(row=8, column=0, columnspan=3, sticky="ew", pady=(0, 7))
         self.frame_stage3.columnconfigure(1, weight=1)
         self.frame_stage3.rowconfigure(5, weight=1)
-        self.latest_search_results_df = None
-        self.latest_search_column = None
+        self.latest_search_export = None
         self.latest_search_value = None
         self.latest_search_type = None
+        self.latest_bulk_results_df = None
+        self.latest_bulk_not_found = []
+        self.folder_search_state = None
+        self.latest_grid_highlight = None
+        self.search_generation = 0
+        self.search_cancel_event = None
+        self.search_result_queue = queue.Queue()
+        self.search_is_live = False
+        self.search_base_key = None
+        self.live_search_base = None
+        self.live_search_after_id = None
+        self.load_columns_generation = 0
+        self.search_index = WorkbookSearchIndex()
+        self.workbook_cache = ParsedWorkbookCache(self.search_index)
 
     # --- Stage 1 methods ---
     def select_input_text_file(self):
@@ -304,7 +1264,7 @@ class ExcelToolApp:
         except Exception as e:
             return False, str(e)
 
-    # --- Stage 2 methods (unchanged) ---
+    # --- Stage 2 methods: headers, column groups, split plan and split ---
     def select_input_split_excel_file(self):
         file_path = filedialog.askopenfilename(
             title="Select Input Excel File (Stage 2)",
@@ -490,10 +1450,23 @@ class ExcelToolApp:
         self.convert_single_button.config(state=tk.DISABLED)
         self.convert_full_button.config(state=tk.DISABLED)
         self.dataiq_button_stage2.config(state=tk.DISABLED)
+        self.split_zip_bundle_check.config(state=tk.DISABLED)
         self.root.update_idletasks()
+        zip_bundle = None
+        bundle_tmp_path = None
         try:
             df = pd.read_excel(input_excel_file, sheet_name=0, header=0, dtype=str)
+            if self.split_zip_bundle_var.get():
+                # Workbooks go straight from memory into the archive; nothing is staged on disk.
+                # The archive is written under a temp name and only renamed into place once the manifest is in it.
+                input_base_name = os.path.splitext(os.path.basename(input_excel_file))[0]
+                bundle_path = os.path.join(output_folder, f"{input_base_name}_split.zip")
+                bundle_tmp_path = bundle_path + ".tmp"
+                zip_bundle = zipfile.ZipFile(bundle_tmp_path, "w")
+                manifest_entries = []
             split_count = 0
+            # Windows file names (and zip entries extracted there) are case-insensitive, like the grouping itself
+            used_names = set()
             for output_file_name, columns_to_include in zip(output_file_names, column_groups_list):
                 output_file_path = os.path.join(output_folder, f"{output_file_name}.xlsx")
                 try:
@@ -501,20 +1474,45 @@ class ExcelToolApp:
                     if missing_cols:
                         messagebox.showwarning("Missing Columns", f"Skipping group for '{output_file_name}.xlsx' due to missing columns in the first sheet: {', '.join(missing_cols)}")
                         continue
+                    entry_name = f"{output_file_name}.xlsx"
+                    if entry_name.casefold() in used_names:
+                        messagebox.showwarning("Duplicate File Name", f"Skipping group for '{entry_name}': another group already wrote a file with this name (names are not case-sensitive).")
+                        continue
+                    used_names.add(entry_name.casefold())
                     df_subset = df[columns_to_include]
-                    df_subset.to_excel(output_file_path, index=False)
-                    if os.path.exists(output_file_path) and os.path.getsize(output_file_path) > 100:
-                        wb = load_workbook(output_file_path)
-                        ws = wb.active
-                        text_fmt = '@'
-                        for row in ws.iter_rows():
-                            for cell in row:
-                                cell.number_format = text_fmt
-                        wb.save(output_file_path)
+                    workbook_bytes = self.build_group_workbook_bytes(df_subset)
+                    if zip_bundle is not None:
+                        # .xlsx is already deflated, so store it as-is instead of compressing twice
+                        zip_bundle.writestr(entry_name, workbook_bytes, compress_type=zipfile.ZIP_STORED)
+                        manifest_entries.append({
+                            "file": entry_name,
+                            "columns": list(columns_to_include),
+                            "rows": len(df_subset),
+                            "bytes": len(workbook_bytes),
+                            "sha256": hashlib.sha256(workbook_bytes).hexdigest(),
+                        })
+                    else:
+                        with open(output_file_path, "wb") as f:
+                            f.write(workbook_bytes)
                     split_count += 1
                 except Exception as save_error:
                     messagebox.showwarning("Save Error", f"Could not save group to '{output_file_path}': {save_error}")
-            if split_count > 0:
+            if zip_bundle is not None:
+                manifest = {
+                    "source": os.path.basename(input_excel_file),
+                    "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "files": manifest_entries,
+                }
+                zip_bundle.writestr("manifest.json", json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+                zip_bundle.close()
+                zip_bundle = None
+                os.replace(bundle_tmp_path, bundle_path)
+                bundle_tmp_path = None
+                if split_count > 0:
+                    messagebox.showinfo("Split Success", f"Successfully split Excel file into {split_count} files bundled in: {bundle_path}")
+                else:
+                    messagebox.showwarning("Split Completed", f"Split operation completed, but no files were added to the bundle: {bundle_path}")
+            elif split_count > 0:
                 messagebox.showinfo("Split Success", f"Successfully split Excel file into {split_count} files in folder: {output_folder}")
             else:
                 messagebox.showwarning("Split Completed", f"Split operation completed, but no files were successfully created in folder: {output_folder}")
@@ -523,6 +1521,12 @@ class ExcelToolApp:
         except Exception as e:
             messagebox.showerror("Split Failed", str(e))
         finally:
+            if zip_bundle is not None:
+                zip_bundle.close()
+            if bundle_tmp_path is not None and os.path.exists(bundle_tmp_path):
+                # The split failed part-way; don't leave an archive without a manifest behind
+                os.remove(bundle_tmp_path)
+            self.split_zip_bundle_check.config(state=tk.NORMAL)
             self.convert_single_button.config(state=tk.NORMAL)
             self.convert_full_button.config(state=tk.NORMAL)
             self.dataiq_button_stage2.config(state=tk.NORMAL)
@@ -535,6 +1539,120 @@ class ExcelToolApp:
             if self.defined_column_groups:
                 self.perform_split_button.config(state=tk.NORMAL)
             self.split_groups_listbox.config(state=tk.NORMAL)
+    def build_group_workbook_bytes(self, df_subset):
+        # Write the group once in memory and apply the text format before anything touches disk
+        buffer = io.BytesIO()
+        df_subset.to_excel(buffer, index=False)
+        buffer.seek(0)
+        wb = load_workbook(buffer)
+        ws = wb.active
+        text_fmt = '@'
+        for row in ws.iter_rows():
+            for cell in row:
+                cell.number_format = text_fmt
+        output = io.BytesIO()
+        wb.save(output)
+        return output.getvalue()
+    def count_excel_data_rows(self, input_excel_file, sample_rows=0):
+        # The <dimension> tag is cheap to read but often missing or stale in exported files; if it is absent or
+        # claims fewer rows than the sample already read, the rows are counted by streaming the sheet instead
+        wb = load_workbook(input_excel_file, read_only=True)
+        try:
+            ws = wb.worksheets[0]
+            max_row = ws.max_row
+            if max_row is None or max_row - 1 < sample_rows:
+                max_row = sum(1 for _ in ws.iter_rows(values_only=True))
+            return max(max_row - 1, sample_rows, 0)
+        finally:
+            wb.close()
+    def plan_column_group_split(self):
+        input_excel_file = self.input_split_excel_entry.get()
+        if not input_excel_file:
+            messagebox.showerror("Input Error", "Please select an Input Excel File (Stage 2).")
+            return
+        if not os.path.exists(input_excel_file):
+            messagebox.showerror("File Not Found", f"Input Excel file not found at {input_excel_file}")
+            return
+        if not self.defined_column_groups:
+            messagebox.showwarning("No Groups Defined", "Please define at least one column group to plan the split.")
+            return
+        # Reading the sample and building each group's workbook in memory can take a while on large inputs,
+        # so the plan is worked out on a worker and only the result dialog runs on the Tk thread
+        self.plan_split_button.config(state=tk.DISABLED)
+        column_groups = list(self.defined_column_groups)
+        self.run_on_worker(
+            lambda: self.build_split_plan(input_excel_file, column_groups),
+            self.finish_plan_column_group_split
+        )
+    def build_split_plan(self, input_excel_file, column_groups):
+        # Returns (plan lines, number of flagged groups); nothing is written to disk
+        # Opening the file and parsing sharedStrings costs the same for 1 row as for the whole sheet, so that setup
+        # time is measured with a one-row read and only the remainder is scaled up to the full row count
+        setup_start = time.perf_counter()
+        pd.read_excel(input_excel_file, sheet_name=0, header=0, dtype=str, nrows=1)
+        setup_seconds = time.perf_counter() - setup_start
+        read_start = time.perf_counter()
+        sample_df = pd.read_excel(input_excel_file, sheet_name=0, header=0, dtype=str, nrows=SPLIT_PLAN_SAMPLE_ROWS)
+        read_seconds = time.perf_counter() - read_start
+        sample_rows = len(sample_df)
+        total_rows = self.count_excel_data_rows(input_excel_file, sample_rows)
+        scale = total_rows / sample_rows if sample_rows else 0
+        total_bytes = 0
+        total_seconds = setup_seconds + max(read_seconds - setup_seconds, 0) * scale
+        flagged_groups = 0
+        seen_names = {}
+        seen_columns = {}
+        lines = [f"Source: {total_rows:,} data rows, {len(sample_df.columns)} columns (sampled {sample_rows:,} rows)", ""]
+        for i, (output_file_name, columns) in enumerate(column_groups, start=1):
+            flags = []
+            name_key = output_file_name.lower()
+            if name_key in seen_names:
+                flags.append(f"same file name as Group {seen_names[name_key]}")
+            else:
+                seen_names[name_key] = i
+            columns_key = frozenset(columns)
+            if columns_key in seen_columns:
+                flags.append(f"same columns as Group {seen_columns[columns_key]}")
+            else:
+                seen_columns[columns_key] = i
+            if total_rows + 1 > EXCEL_MAX_ROWS:
+                flags.append(f"{total_rows + 1:,} rows exceeds Excel limit of {EXCEL_MAX_ROWS:,}")
+            if len(columns) > EXCEL_MAX_COLUMNS:
+                flags.append(f"{len(columns):,} columns exceeds Excel limit of {EXCEL_MAX_COLUMNS:,}")
+            missing_cols = [col for col in columns if col not in sample_df.columns]
+            if missing_cols:
+                flags.append(f"missing columns: {', '.join(missing_cols)}")
+                estimate = "will be skipped"
+            else:
+                # Same for writing: an empty workbook's time and size are fixed, only the rows scale
+                write_start = time.perf_counter()
+                empty_bytes = len(self.build_group_workbook_bytes(sample_df[columns].iloc[:0]))
+                empty_seconds = time.perf_counter() - write_start
+                write_start = time.perf_counter()
+                sample_bytes = len(self.build_group_workbook_bytes(sample_df[columns]))
+                sample_seconds = time.perf_counter() - write_start
+                group_seconds = empty_seconds + max(sample_seconds - empty_seconds, 0) * scale
+                group_bytes = empty_bytes + int(max(sample_bytes - empty_bytes, 0) * scale)
+                total_bytes += group_bytes
+                total_seconds += group_seconds
+                estimate = f"{total_rows:,} rows x {len(columns)} cols, ~{format_byte_size(group_bytes)}, ~{group_seconds:.1f}s"
+            lines.append(f"Group {i} -> {output_file_name}.xlsx: {estimate}")
+            if flags:
+                flagged_groups += 1
+                lines.append("    WARNING: " + "; ".join(flags))
+        lines.append("")
+        lines.append(f"Estimated total: ~{format_byte_size(total_bytes)} on disk, ~{total_seconds:.1f}s. Nothing was written.")
+        return lines, flagged_groups
+    def finish_plan_column_group_split(self, result, error):
+        self.plan_split_button.config(state=tk.NORMAL)
+        if error is not None:
+            messagebox.showerror("Plan Failed", str(error))
+            return
+        lines, flagged_groups = result
+        if flagged_groups:
+            messagebox.showwarning("Split Plan", f"{flagged_groups} group(s) need attention.\n\n" + "\n".join(lines))
+        else:
+            messagebox.showinfo("Split Plan", "\n".join(lines))
 
     # --- Stage 3 search: load columns, search, UI highlight, export, email/click ---
     def load_search_excel_columns(self):
@@ -545,112 +1663,383 @@ class ExcelToolApp:
         self.search_value_entry.delete(0, tk.END)
         self.search_value_entry.config(state="disabled")
         self.search_button.config(state="disabled")
+        self.bulk_search_button.config(state="disabled")
+        self.search_folder_button.config(state="disabled")
         self.export_results_button.config(state="disabled")
-        for widget in self.results_inner_frame.winfo_children():
-            widget.destroy()
+        self.results_grid.clear()
         if not input_excel_file:
             messagebox.showwarning("Input Error", "Please select an Input Excel File for Search (Stage 3).")
             return
         if not os.path.exists(input_excel_file):
             messagebox.showwarning("File Not Found", f"Input Excel file not found: {input_excel_file}")
             return
+        # Loading columns also builds (or validates) the on-disk index and warms the in-memory cache, on a worker thread
+        self.search_index_status_label.config(text="Indexing workbook...")
+        self.load_columns_generation += 1
+        generation = self.load_columns_generation
+        load_start = time.perf_counter()
+        self.run_on_worker(
+            lambda: self.workbook_cache.get(input_excel_file).headers,
+            lambda headers, error: self.finish_load_search_excel_columns(generation, input_excel_file, headers, error, time.perf_counter() - load_start)
+        )
+    def run_on_worker(self, work, on_done):
+        # Runs work() on a daemon thread and hands (result, error) to on_done on the Tk thread
+        result_queue = queue.Queue(maxsize=1)
+        def target():
+            try:
+                result_queue.put((work(), None))
+            except Exception as e:
+                result_queue.put((None, e))
+        def poll():
+            try:
+                result, error = result_queue.get_nowait()
+            except queue.Empty:
+                self.root.after(50, poll)
+                return
+            on_done(result, error)
+        threading.Thread(target=target, daemon=True).start()
+        self.root.after(50, poll)
+    def finish_load_search_excel_columns(self, generation, input_excel_file, headers, error, load_seconds):
+        if generation != self.load_columns_generation:
+            return # A newer Load Columns superseded this one
         try:
-            headers_df = pd.read_excel(input_excel_file, nrows=0)
-            headers = headers_df.columns.tolist()
+            if error is not None:
+                raise error
+            self.search_index_status_label.config(text=f"Loaded in {load_seconds:.1f}s | {self.workbook_cache.stats_text()}")
             if headers:
                 self.search_column_combobox['values'] = headers
                 self.search_column_combobox.config(state="readonly")
                 self.search_value_entry.config(state="normal")
                 self.search_button.config(state="normal")
+                self.bulk_search_button.config(state="normal")
+                self.search_folder_button.config(state="normal")
             else:
                 messagebox.showwarning("No Headers Found", f"Could not detect headers in Excel file: {input_excel_file}.\nCheck if the first row contains headers.")
         except Exception as e:
+            self.search_index_status_label.config(text="")
             messagebox.showerror("Error Loading Excel Headers", str(e))
-    def perform_search(self):
+    def get_fuzzy_max_edits(self):
+        try:
+            return int(self.fuzzy_max_edits_spinbox.get())
+        except ValueError:
+            return 2
+    def on_search_value_key(self, event):
+        if not self.live_search_var.get() or event.keysym == "Return":
+            return
+        if self.live_search_after_id is not None:
+            self.root.after_cancel(self.live_search_after_id)
+        self.live_search_after_id = self.root.after(LIVE_SEARCH_DEBOUNCE_MS, self.run_live_search)
+    def run_live_search(self):
+        self.live_search_after_id = None
+        self.perform_search(live=True)
+    def perform_search(self, live=False):
         input_excel_file = self.input_search_excel_entry.get()
         selected_column = self.search_column_combobox.get()
         search_value = self.search_value_entry.get().strip()
         search_type = self.search_type_var.get()
-        for widget in self.results_inner_frame.winfo_children():
-            widget.destroy()
+        self.results_grid.clear()
         self.export_results_button.config(state="disabled")
-        self.latest_search_results_df = None
-        self.latest_search_column = None
+        self.latest_search_export = None
         self.latest_search_value = None
         self.latest_search_type = None
-        if not input_excel_file or not selected_column or not search_value or not os.path.exists(input_excel_file):
-            messagebox.showwarning("Input Error", "All fields are required and file must exist.")
+        if search_type == "query":
+            # Query mode names its own columns, so the column selector is not used
+            selected_column = None
+        if not input_excel_file or (search_type != "query" and not selected_column) or not search_value or not os.path.exists(input_excel_file):
+            if live:
+                self.cancel_search()
+                self.search_index_status_label.config(text="")
+            else:
+                messagebox.showwarning("Input Error", "All fields are required and file must exist.")
             return
+        base_key = None
+        base_positions = None
+        if live:
+            # Live search never parses the workbook; it only runs against a sheet already in memory
+            if self.workbook_cache.peek(input_excel_file) is None:
+                self.search_index_status_label.config(text="Search as you type needs the workbook loaded: click Load Columns first, or wait for loading to finish.")
+                return
+            if search_type == "contains":
+                base_key = (ParsedWorkbookCache.fingerprint(input_excel_file), selected_column)
+                if self.live_search_base is not None and self.live_search_base[0] == base_key and self.live_search_base[1] in search_value.casefold():
+                    base_positions = self.live_search_base[2]
+        # A new search supersedes whatever is still running
+        self.cancel_search()
+        self.search_generation += 1
+        generation = self.search_generation
+        self.search_is_live = live
+        self.search_base_key = base_key
+        self.search_cancel_event = threading.Event()
+        self.cancel_search_button.config(state="normal")
+        self.search_index_status_label.config(text="Searching...")
+        worker = threading.Thread(
+            target=self.run_search_worker,
+            args=(generation, self.search_cancel_event, input_excel_file, selected_column, search_value, search_type, self.get_fuzzy_max_edits(), base_positions),
+            daemon=True
+        )
+        worker.start()
+        self.root.after(50, self.poll_search_results, generation)
+    def run_search_worker(self, generation, cancel_event, input_excel_file, selected_column, search_value, search_type, max_edits, base_positions=None):
+        # Runs off the Tk thread and only talks to the UI through search_result_queue. Matches are posted chunk by
+        # chunk as the search finds them, and cancellation is checked between chunks, so Cancel Search also stops a
+        # long regex or fuzzy scan part way; a cancelled or superseded worker's output is discarded.
+        def post(*message):
+            self.search_result_queue.put((generation,) + message)
         try:
-            df = pd.read_excel(input_excel_file, dtype=str)
-            if selected_column not in df.columns:
-                messagebox.showerror("Column Error", f"Selected column '{selected_column}' not found in the Excel file.")
+            search_start = time.perf_counter()
+            sheet = self.workbook_cache.get(input_excel_file)
+            if cancel_event.is_set():
                 return
-            if search_type == "exact":
-                mask = df[selected_column].astype(str).str.lower() == search_value.lower()
-            else:
-                mask = df[selected_column].astype(str).str.contains(search_value, case=False, na=False, regex=False)
-            results_df = df[mask].copy()
-            results_df = results_df.where(pd.notnull(results_df), "")
-            if not results_df.empty:
-                self.display_results_in_grid_with_highlight(results_df, selected_column, search_value, search_type)
-                self.latest_search_results_df = results_df
-                self.latest_search_column = selected_column
-                self.latest_search_value = search_value
-                self.latest_search_type = search_type
-                self.export_results_button.config(state="normal")
+            if selected_column is not None and selected_column not in sheet.headers:
+                post("error", "Column Error", f"Selected column '{selected_column}' not found in the Excel file.")
+                return
+            if base_positions is not None:
+                # The query extends the previous one, so only the previous matches can still match
+                column_values = sheet.normalized_column(selected_column).iloc[base_positions]
+                still_matching = column_values.str.contains(search_value.casefold(), regex=False).to_numpy(dtype=bool)
+                chunks = [sheet.df.iloc[base_positions[still_matching]]]
             else:
-                info = tk.Label(self.results_inner_frame, text=f"No results found for '{search_value}' in column '{selected_column}'.", anchor="w", bg="white")
-                info.grid(row=0, column=0, sticky="nsew", padx=2, pady=2)
+                chunks = iter_search_chunks(sheet, selected_column, search_value, search_type, max_edits)
+            found = []
+            match_count = 0
+            for chunk in chunks:
+                if cancel_event.is_set():
+                    return
+                if chunk.empty:
+                    continue
+                found.append(chunk)
+                match_count += len(chunk)
+                if len(found) == 1:
+                    # The first rows go out on their own so they are drawn before the rest of the chunk
+                    post("first", chunk.iloc[:SEARCH_FIRST_CHUNK_ROWS], min(len(chunk), SEARCH_FIRST_CHUNK_ROWS), selected_column, search_value, search_type)
+                    chunk = chunk.iloc[SEARCH_FIRST_CHUNK_ROWS:]
+                if not chunk.empty:
+                    post("more", chunk, match_count)
+            if cancel_event.is_set():
+                return
+            results_df = pd.concat(found) if found else sheet.df.iloc[0:0]
+            if search_type == "fuzzy":
+                results_df = rank_fuzzy_results(results_df)
+            post("done", sheet, results_df, (time.perf_counter() - search_start) * 1000, selected_column, search_value, search_type)
+        except re.error as regex_error:
+            post("error", "Regex Error", f"Invalid regular expression: {regex_error}")
+        except ValueError as query_error:
+            post("error", "Query Error", str(query_error))
         except Exception as e:
-            messagebox.showerror("Search Error", str(e))
-            info = tk.Label(self.results_inner_frame, text=f"An error occurred during the search: {e}", anchor="w", bg="white")
-            info.grid(row=0, column=0, sticky="nsew", padx=2, pady=2)
-    def display_results_in_grid_with_highlight(self, df, highlight_col, search_value, search_type):
-        for j, col in enumerate(df.columns):
-            lbl = tk.Label(self.results_inner_frame, text=col, relief="solid", borderwidth=1, bg="#B7D6F6", font=("Arial", 10, "bold"), padx=5, pady=2)
-            lbl.grid(row=0, column=j, sticky="nsew")
-            self.results_inner_frame.grid_columnconfigure(j, minsize=100, weight=1)
-        company_col = None
-        email_col = None
-        for idx, c in enumerate(df.columns):
-            if c.lower() == "company":
-                company_col = idx
-            if c.lower() == "email":
-                email_col = idx
-        for i, (_, row) in enumerate(df.iterrows(), start=1):
-            for j, val in enumerate(row):
-                cell_value = "" if pd.isna(val) or str(val).lower() == "nan" else val
-                cell_bg = "white"
-                font_style = ("Arial", 10)
-                fg = "black"
-                if df.columns[j] == highlight_col:
-                    compare_val = str(cell_value)
-                    if (search_type == "exact" and compare_val.lower() == search_value.lower()) or \
-                       (search_type == "contains" and search_value.lower() in compare_val.lower()):
-                        cell_bg = "#FFD966"
-                if self.is_valid_email(cell_value):
-                    cell = tk.Label(self.results_inner_frame, text=cell_value, fg="blue", cursor="hand2",
-                                    relief="solid", borderwidth=1, bg=cell_bg, font=font_style, padx=5, pady=2)
-                    company_val = ""
-                    if company_col is not None:
-                        company_val = row[company_col]
-                    cell.bind("<Button-1>", lambda e, email=cell_value, company=company_val: self.open_outlook_mail(email, company))
-                else:
-                    cell = tk.Label(self.results_inner_frame, text=cell_value, relief="solid", borderwidth=1,
-                                    bg=cell_bg, font=font_style, padx=5, pady=2, fg=fg)
-                cell.grid(row=i, column=j, sticky="nsew")
-        self.results_inner_frame.update_idletasks()
-    def is_valid_email(self, val):
-        if isinstance(val, str) and re.match(r"^[\w\.-]+@[\w\.-]+\.\w+$", val):
-            return True
-        return False
+            post("error", "Search Error", str(e))
+    def poll_search_results(self, generation):
+        if generation != self.search_generation:
+            return
+        while True:
+            try:
+                message = self.search_result_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] != generation:
+                continue
+            kind = message[1]
+            if kind == "first":
+                _, _, first_df, match_count, selected_column, search_value, search_type = message
+                self.display_results_in_grid_with_highlight(first_df, selected_column, search_value, search_type)
+                self.search_index_status_label.config(text=f"Searching... {match_count:,} match(es) so far")
+                # Let Tk paint the first rows before the remainder is added
+                self.root.after(1, self.poll_search_results, generation)
+                return
+            if kind == "more":
+                _, _, more_df, match_count = message
+                self.display_results_in_grid_with_highlight(more_df, *self.latest_grid_highlight, append=True)
+                self.search_index_status_label.config(text=f"Searching... {match_count:,} match(es) so far")
+            elif kind == "done":
+                _, _, sheet, results_df, elapsed_ms, selected_column, search_value, search_type = message
+                self.finish_search(sheet, results_df, elapsed_ms, selected_column, search_value, search_type)
+                return
+            elif kind == "error":
+                _, _, title, error_text = message
+                self.search_cancel_event = None
+                self.cancel_search_button.config(state="disabled")
+                if self.search_is_live:
+                    # No dialogs while typing; a half-typed regex or query is expected to be invalid
+                    self.search_index_status_label.config(text=f"{title}: {error_text}")
+                    return
+                self.search_index_status_label.config(text="")
+                messagebox.showerror(title, error_text)
+                if title == "Search Error":
+                    self.results_grid.show_message(f"An error occurred during the search: {error_text}")
+                return
+        self.root.after(50, self.poll_search_results, generation)
+    def finish_search(self, sheet, results_df, elapsed_ms, selected_column, search_value, search_type):
+        if self.search_base_key is not None:
+            # Sheet rows keep their RangeIndex through the search, so the index labels are the row positions
+            self.live_search_base = (self.search_base_key, search_value.casefold(), results_df.index.to_numpy())
+        else:
+            self.live_search_base = None
+        self.search_cancel_event = None
+        self.cancel_search_button.config(state="disabled")
+        if search_type == "fuzzy":
+            # Fuzzy chunks arrive in sheet order; once all are in, the grid ranks them like the export
+            self.results_grid.set_sort("Similarity %", descending=True)
+        self.results_grid.finish_data()
+        self.search_index_status_label.config(text=f"{len(results_df):,} match(es) in {elapsed_ms:.0f} ms | {self.workbook_cache.stats_text()}")
+        if not results_df.empty:
+            # Export re-reads the matching rows from the cached sheet page by page; only their positions are kept,
+            # plus any columns the search added (e.g. fuzzy "Similarity %")
+            extra_columns = {col: results_df[col].to_numpy() for col in results_df.columns if col not in sheet.df.columns}
+            self.latest_search_export = [(sheet.df, results_df.index.to_numpy(), extra_columns, selected_column)]
+            self.latest_search_value = search_value
+            self.latest_search_type = search_type
+            self.export_results_button.config(state="normal")
+        elif search_type == "query":
+            self.results_grid.show_message(f"No rows match the query '{search_value}'.")
+        else:
+            self.results_grid.show_message(f"No results found for '{search_value}' in column '{selected_column}'.")
+    def cancel_search(self):
+        if self.folder_search_state is not None:
+            self.cancel_folder_search()
+        if self.search_cancel_event is None:
+            return
+        self.search_cancel_event.set()
+        self.search_cancel_event = None
+        # Bumping the generation stops the poll loop and drops anything the old worker still posts
+        self.search_generation += 1
+        self.cancel_search_button.config(state="disabled")
+        self.search_index_status_label.config(text="Search cancelled.")
+    # --- Stage 3 folder search: every sheet of every workbook, indexed in parallel ---
+    def start_folder_search(self):
+        selected_column = self.search_column_combobox.get()
+        search_value = self.search_value_entry.get().strip()
+        search_type = self.search_type_var.get()
+        if self.folder_search_state is not None:
+            messagebox.showwarning("Search Running", "A folder search is already running.")
+            return
+        if search_type == "query":
+            selected_column = None
+        if (search_type != "query" and not selected_column) or not search_value:
+            messagebox.showwarning("Input Error", "Please select a column (load columns from any one of the workbooks) and enter a value to search for.")
+            return
+        folder_path = filedialog.askdirectory(title="Select Folder of Excel Workbooks to Search")
+        if not folder_path:
+            return
+        workbook_paths = sorted(
+            os.path.join(folder_path, name) for name in os.listdir(folder_path)
+            if name.lower().endswith((".xlsx", ".xlsm")) and not name.startswith("~$")
+        )
+        if not workbook_paths:
+            messagebox.showwarning("No Workbooks", f"No .xlsx or .xlsm files found in: {folder_path}")
+            return
+        self.results_grid.clear()
+        self.export_results_button.config(state="disabled")
+        self.search_button.config(state="disabled")
+        self.search_folder_button.config(state="disabled")
+        self.latest_search_export = None
+        self.cancel_search()
+        # Indexing, loading and searching each workbook all run in separate processes; the Tk thread only
+        # receives the matching rows as each workbook finishes.
+        max_edits = self.get_fuzzy_max_edits()
+        executor = ProcessPoolExecutor(max_workers=min(len(workbook_paths), os.cpu_count() or 1))
+        futures = {
+            executor.submit(search_workbook_sheets, path, self.search_index.index_dir, selected_column, search_value, search_type, max_edits): path
+            for path in workbook_paths
+        }
+        self.folder_search_state = {
+            "executor": executor,
+            "futures": futures,
+            "total": len(workbook_paths),
+            "column": selected_column,
+            "value": search_value,
+            "type": search_type,
+            "results": [],
+            "errors": [],
+            "start": time.perf_counter(),
+        }
+        self.cancel_search_button.config(state="normal")
+        self.search_index_status_label.config(text=f"Searching {len(workbook_paths)} workbook(s)...")
+        self.root.after(100, self.poll_folder_search, self.folder_search_state)
+    def poll_folder_search(self, state):
+        if state is not self.folder_search_state:
+            return # Cancelled, or replaced by a newer folder search; its remaining futures are dropped
+        for future in [f for f in state["futures"] if f.done()]:
+            workbook_path = state["futures"].pop(future)
+            if future.cancelled():
+                continue
+            try:
+                matches, errors = future.result()
+            except Exception as e:
+                state["errors"].append(f"{os.path.basename(workbook_path)}: {e}")
+                continue
+            state["errors"].extend(errors)
+            for sheet_name, column, results_df in matches:
+                self.add_folder_sheet_results(state, workbook_path, sheet_name, column, results_df)
+        match_count = sum(len(df) for df, _ in state["results"])
+        searched = state["total"] - len(state["futures"])
+        self.search_index_status_label.config(text=f"Searched {searched} of {state['total']} workbook(s), {match_count:,} match(es)...")
+        if state["futures"]:
+            self.root.after(100, self.poll_folder_search, state)
+        else:
+            self.finish_folder_search()
+    def cancel_folder_search(self):
+        # Workbooks not yet started are cancelled; ones already running finish in the background and are ignored
+        state = self.folder_search_state
+        self.folder_search_state = None
+        state["executor"].shutdown(wait=False, cancel_futures=True)
+        self.search_button.config(state="normal")
+        self.search_folder_button.config(state="normal")
+        self.cancel_search_button.config(state="disabled")
+        self.search_index_status_label.config(text="Search cancelled.")
+    def add_folder_sheet_results(self, state, workbook_path, sheet_name, column, results_df):
+        # results_df came back from a worker process, so it is already a private copy
+        results_df.insert(0, "Sheet", sheet_name)
+        results_df.insert(0, "Source File", os.path.basename(workbook_path))
+        # column is this sheet's own header, which may differ in case from the one typed; it drives grid and export highlights
+        state["results"].append((results_df, column))
+        self.display_results_in_grid_with_highlight(results_df, column, state["value"], state["type"], append=True)
+    def finish_folder_search(self):
+        state = self.folder_search_state
+        self.folder_search_state = None
+        state["executor"].shutdown(wait=False)
+        self.search_button.config(state="normal")
+        self.search_folder_button.config(state="normal")
+        self.cancel_search_button.config(state="disabled")
+        self.results_grid.finish_data()
+        elapsed = time.perf_counter() - state["start"]
+        match_count = sum(len(df) for df, _ in state["results"])
+        self.search_index_status_label.config(text=f"{match_count:,} match(es) across {state['total']} workbook(s) in {elapsed:.1f}s | {self.workbook_cache.stats_text()}")
+        if state["results"]:
+            # Each sheet's matches are exported in turn rather than concatenated into one frame
+            self.latest_search_export = [(results_df, None, {}, column) for results_df, column in state["results"]]
+            self.latest_search_value = state["value"]
+            self.latest_search_type = state["type"]
+            self.export_results_button.config(state="normal")
+        else:
+            self.results_grid.show_message(f"No results found for '{state['value']}' in {state['total']} workbook(s).")
+        if state["errors"]:
+            messagebox.showwarning("Folder Search", "Some workbooks or sheets could not be searched:\n" + "\n".join(state["errors"][:20]))
+    def on_search_type_change(self):
+        if self.search_type_var.get() == "query":
+            self.search_index_status_label.config(text="Query example: Region = North AND ([Status] contains open OR Amount between 100 and 500)")
+    def compute_highlight_mask(self, df, highlight_col, search_value, search_type):
+        # Highlighting is worked out once per result set with vectorised string ops, not per drawn cell
+        if highlight_col is None or highlight_col not in df.columns:
+            return None
+        column_values = df[highlight_col].astype(str).str.casefold()
+        needle = search_value.casefold()
+        if search_type == "exact":
+            return (column_values == needle).to_numpy()
+        if search_type == "contains":
+            return column_values.str.contains(needle, regex=False).to_numpy(dtype=bool)
+        return np.ones(len(df), dtype=bool)
+    def display_results_in_grid_with_highlight(self, df, highlight_col, search_value, search_type, append=False):
+        self.latest_grid_highlight = (highlight_col, search_value, search_type)
+        highlight_mask = self.compute_highlight_mask(df, highlight_col, search_value, search_type)
+        if append:
+            self.results_grid.append_data(df, highlight_col, highlight_mask)
+        else:
+            self.results_grid.set_data(df, highlight_col, highlight_mask)
     def open_outlook_mail(self, email, company=None):
         if company:
             messagebox.showinfo("Company Info", f"Company: {company}\nEmail: {email}")
         webbrowser.open(f"mailto:{email}")
     def export_search_results_with_color(self):
-        if self.latest_search_results_df is None or self.latest_search_column is None:
+        if self.latest_search_export is None:
             messagebox.showwarning("Export Error", "No search results to export.")
             return
         file_path = filedialog.asksaveasfilename(
@@ -661,25 +2050,202 @@ class ExcelToolApp:
         if not file_path:
             return
         try:
-            self.latest_search_results_df.to_excel(file_path, index=False)
-            wb = load_workbook(file_path)
-            ws = wb.active
+            # Matching rows are paged out of their source frames (the cached sheet, or each sheet's matches for a
+            # folder search) into a write-only workbook; highlights are set as each cell is written
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Search Results")
             fill = PatternFill(start_color="FFD966", end_color="FFD966", fill_type="solid")
-            colnames = list(self.latest_search_results_df.columns)
-            highlight_col_idx = colnames.index(self.latest_search_column)
-            for row_idx, row in enumerate(self.latest_search_results_df.itertuples(index=False), start=2):
-                cell_val = getattr(row, self.latest_search_column.replace(" ", "_"))
-                if self.latest_search_type == "exact":
-                    match = str(cell_val).lower() == str(self.latest_search_value).lower()
-                else:
-                    match = str(self.latest_search_value).lower() in str(cell_val).lower()
-                if match:
-                    ws.cell(row=row_idx, column=highlight_col_idx+1).fill = fill
+            columns = []
+            for source_df, _, extra_columns, _ in self.latest_search_export:
+                columns += [col for col in list(extra_columns) + list(source_df.columns) if col not in columns]
+            ws.append([str(col) for col in columns])
+            for source_df, positions, extra_columns, highlight_col in self.latest_search_export:
+                # Each part highlights its own resolved column (folder-search sheets may spell the header differently)
+                if highlight_col not in columns:
+                    highlight_col = None
+                highlight_idx = columns.index(highlight_col) if highlight_col is not None else -1
+                row_count = len(source_df) if positions is None else len(positions)
+                for start in range(0, row_count, EXPORT_PAGE_ROWS):
+                    stop = start + EXPORT_PAGE_ROWS
+                    page = source_df.iloc[start:stop] if positions is None else source_df.iloc[positions[start:stop]]
+                    if extra_columns:
+                        page = page.copy()
+                        for offset, (name, values) in enumerate(extra_columns.items()):
+                            page.insert(offset, name, values[start:stop])
+                    if list(page.columns) != columns:
+                        page = page.reindex(columns=columns)
+                    highlight_mask = self.compute_highlight_mask(
+                        page, highlight_col, str(self.latest_search_value), self.latest_search_type
+                    )
+                    for row_values, highlighted in zip(page.itertuples(index=False, name=None),
+                                                       highlight_mask if highlight_mask is not None else [False] * len(page)):
+                        row_values = ["" if pd.isna(value) else value for value in row_values]
+                        if highlighted:
+                            cell = WriteOnlyCell(ws, value=row_values[highlight_idx])
+                            cell.fill = fill
+                            row_values[highlight_idx] = cell
+                        ws.append(row_values)
             wb.save(file_path)
             messagebox.showinfo("Export Success", f"Search results exported to {file_path} with highlights.")
         except Exception as e:
             messagebox.showerror("Export Failed", f"Could not export colored results: {e}")
 
+    # --- Stage 3 bulk lookup: many keys against one column in a single pass ---
+    def open_bulk_search_dialog(self):
+        input_excel_file = self.input_search_excel_entry.get()
+        selected_column = self.search_column_combobox.get()
+        if not input_excel_file or not selected_column or not os.path.exists(input_excel_file):
+            messagebox.showwarning("Input Error", "Please load an existing Excel file and select a column first.")
+            return
+        dialog = Toplevel(self.root)
+        dialog.title(f"Bulk Search in '{selected_column}'")
+        dialog.geometry("480x420")
+        tk.Label(dialog, text="Paste values (one per line) or load them from the first column of a file:", anchor="w", wraplength=450, justify="left").pack(fill="x", padx=10, pady=(10, 3))
+        keys_frame = tk.Frame(dialog)
+        keys_frame.pack(fill="both", expand=True, padx=10, pady=3)
+        keys_text = tk.Text(keys_frame, height=14, width=50)
+        keys_text.pack(side="left", fill="both", expand=True)
+        keys_scrollbar = Scrollbar(keys_frame, command=keys_text.yview)
+        keys_scrollbar.pack(side="right", fill="y")
+        keys_text.config(yscrollcommand=keys_scrollbar.set)
+        keys_header_var = BooleanVar(value=True)
+        Checkbutton(dialog, text="Files start with a header row (skip it)", variable=keys_header_var, anchor="w").pack(fill="x", padx=10)
+        status_label = tk.Label(dialog, text="", anchor="w", fg="#555555")
+        status_label.pack(fill="x", padx=10)
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(pady=10)
+        export_button = tk.Button(button_frame, text="Export Results...", state="disabled", command=self.export_bulk_search_results)
+        tk.Button(button_frame, text="Load Keys from File...", command=lambda: self.load_bulk_keys_file(keys_text, keys_header_var.get())).grid(row=0, column=0, padx=5)
+        tk.Button(
+            button_frame, text="Run Bulk Search", bg="#17A2B8", fg="white",
+            command=lambda: self.run_bulk_search(input_excel_file, selected_column, keys_text, status_label, export_button)
+        ).grid(row=0, column=1, padx=5)
+        export_button.grid(row=0, column=2, padx=5)
+    def load_bulk_keys_file(self, keys_text, has_header=True):
+        file_path = filedialog.askopenfilename(
+            title="Select File of Search Values",
+            filetypes=[("Text/CSV/Excel Files", "*.txt *.csv *.xlsx"), ("All Files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            # Only the first column of a spreadsheet or CSV holds keys; other columns are ignored
+            if file_path.lower().endswith((".xlsx", ".xls")):
+                keys = pd.read_excel(file_path, header=0 if has_header else None, dtype=str).iloc[:, 0].dropna().tolist()
+                raw_text = "\n".join(keys)
+            elif file_path.lower().endswith(".csv"):
+                with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+                    rows = list(csv.reader(f))
+                if has_header:
+                    rows = rows[1:]
+                raw_text = "\n".join(row[0] for row in rows if row)
+            else:
+                with open(file_path, "r", encoding="utf-8-sig") as f:
+                    raw_text = f.read()
+            keys_text.delete("1.0", tk.END)
+            keys_text.insert("1.0", raw_text)
+        except Exception as e:
+            messagebox.showerror("Error Loading Keys", str(e))
+    def parse_bulk_keys(self, raw_text):
+        keys = []
+        seen = set()
+        # One key per line, so values such as "Smith, John" stay whole
+        for key in raw_text.splitlines():
+            key = key.strip()
+            if key and key.casefold() not in seen:
+                seen.add(key.casefold())
+                keys.append(key)
+        return keys
+    def perform_bulk_search(self, input_excel_file, selected_column, keys):
+        # Hash join: one dict lookup per key against the column's exact-match index
+        sheet = self.workbook_cache.get(input_excel_file)
+        if selected_column not in sheet.headers:
+            raise KeyError(selected_column)
+        exact_index = sheet.exact_index(selected_column)
+        matched_positions = []
+        matched_keys = []
+        not_found = []
+        for key in keys:
+            positions = exact_index.lookup(key.casefold())
+            if len(positions):
+                matched_positions.append(positions)
+                matched_keys.extend([key] * len(positions))
+            else:
+                not_found.append(key)
+        if matched_positions:
+            results_df = sheet.df.iloc[np.concatenate(matched_positions)].copy()
+        else:
+            results_df = sheet.df.iloc[0:0].copy()
+        results_df.insert(0, "Matched Key", matched_keys)
+        return results_df, not_found
+    def run_bulk_search(self, input_excel_file, selected_column, keys_text, status_label, export_button):
+        keys = self.parse_bulk_keys(keys_text.get("1.0", tk.END))
+        if not keys:
+            messagebox.showwarning("Input Error", "Please paste or load at least one value to search for.")
+            return
+        # The bulk results take over the grid, so any single or live search still running is stopped first
+        self.cancel_search()
+        self.search_generation += 1
+        generation = self.search_generation
+        # The workbook may still need parsing, so the join runs on a worker
+        status_label.config(text=f"Searching for {len(keys):,} value(s)...")
+        export_button.config(state="disabled")
+        search_start = time.perf_counter()
+        self.run_on_worker(
+            lambda: self.perform_bulk_search(input_excel_file, selected_column, keys),
+            lambda result, error: self.finish_bulk_search(generation, result, error, (time.perf_counter() - search_start) * 1000, selected_column, keys, status_label, export_button)
+        )
+    def finish_bulk_search(self, generation, result, error, search_ms, selected_column, keys, status_label, export_button):
+        if generation != self.search_generation:
+            return # A newer search replaced the grid while the bulk lookup ran
+        if isinstance(error, KeyError):
+            messagebox.showerror("Column Error", f"Selected column '{selected_column}' not found in the Excel file.")
+            return
+        if error is not None:
+            messagebox.showerror("Bulk Search Error", str(error))
+            return
+        results_df, not_found = result
+        if not status_label.winfo_exists():
+            return # Dialog was closed while the search ran
+        self.latest_bulk_results_df = results_df
+        self.latest_bulk_not_found = not_found
+        status_label.config(text=f"{len(keys) - len(not_found):,} of {len(keys):,} value(s) found, {len(results_df):,} row(s), {len(not_found):,} not found ({search_ms:.0f} ms)")
+        export_button.config(state="normal")
+        # The main Export Results and the live-search narrowing both describe the previous single search
+        self.latest_search_export = None
+        self.live_search_base = None
+        self.export_results_button.config(state="disabled")
+        self.results_grid.clear()
+        if not results_df.empty:
+            self.display_results_in_grid_with_highlight(results_df, None, "", "exact")
+        else:
+            self.results_grid.show_message(f"None of the {len(keys):,} value(s) were found in column '{selected_column}'.")
+    def export_bulk_search_results(self):
+        if self.latest_bulk_results_df is None:
+            messagebox.showwarning("Export Error", "No bulk search results to export.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="Save Bulk Search Results",
+            defaultextension=".xlsx",
+            filetypes=[("Excel Files", "*.xlsx"), ("CSV Files", "*.csv"), ("All Files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            not_found_df = pd.DataFrame({"Not Found": self.latest_bulk_not_found})
+            if file_path.lower().endswith(".csv"):
+                self.latest_bulk_results_df.to_csv(file_path, index=False, encoding="utf-8-sig")
+                not_found_path = os.path.splitext(file_path)[0] + "_not_found.csv"
+                not_found_df.to_csv(not_found_path, index=False, encoding="utf-8-sig")
+                messagebox.showinfo("Export Success", f"Bulk search results exported to {file_path}\nNot-found values exported to {not_found_path}")
+            else:
+                with pd.ExcelWriter(file_path) as writer:
+                    self.latest_bulk_results_df.to_excel(writer, sheet_name="Matches", index=False)
+                    not_found_df.to_excel(writer, sheet_name="Not Found", index=False)
+                messagebox.showinfo("Export Success", f"Bulk search results exported to {file_path}")
+        except Exception as e:
+            messagebox.showerror("Export Failed", f"Could not export bulk search results: {e}")
+
     # --- Remaining unchanged methods ---
     def on_group_select(self, event):
         if self.group_definition_frame.winfo_ismapped():
@@ -702,6 +2268,7 @@ class ExcelToolApp:
             messagebox.showerror("Error Opening URL", f"Could not open the DataIQ URL: {e}")
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = ExcelToolApp(root)
     root.mainloop()